@@ -9,7 +9,7 @@ from backend.service.task_submitter import submit_job_to_pipeline
 from backend.service.task_tracker import update_task_status, get_task_status
 from backend.service.soft_match import generate_soft_match_candidates
 from backend.tasks.steps import run_soft_match_apply
-from backend.utils.io import load_common_ids_from_redis, find_entity_cfg_by_label
+from backend.utils.io import load_common_ids_from_redis, find_entity_cfg_by_label, invalidate_job_cache
 from backend.config import Config
 import logging
 import redis
@@ -129,6 +129,7 @@ def submit_mappings(data: MappingSubmission):
     # Store mappings in Redis for downstream access
     redis_mapping_key = f"mappings:{job_id}"
     r.set(redis_mapping_key, json.dumps([m.model_dump() for m in mappings]))
+    invalidate_job_cache(job_id)
 
     # Resume pipeline
     pipeline_task_id = submit_job_to_pipeline(
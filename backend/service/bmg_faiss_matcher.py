@@ -43,9 +43,28 @@ class BiobertEncoder:
         self.model = AutoModel.from_pretrained(model_path)
         self.model.to(self.device)
         self.model.eval()
+        if os.getenv("BMG_TORCH_COMPILE") == "1":
+            # Opt-in: padded batch lengths vary, so compile with dynamic shapes
+            self.model = torch.compile(self.model, dynamic=True)
+
+    def embed(self, texts: List[str], batch_size: int = 256) -> np.ndarray:
+        if len(texts) <= batch_size:
+            return self._embed_batch(texts)
+
+        # Large query lists (one per input column): length-sorted micro-batches keep each
+        # forward's padding, and peak activation memory, small; results go back in input order
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        out = None
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            vecs = self._embed_batch([texts[i] for i in idx])
+            if out is None:
+                out = np.empty((len(texts), vecs.shape[1]), dtype=vecs.dtype)
+            out[idx] = vecs
+        return out
 
     @torch.inference_mode()
-    def embed(self, texts: List[str]) -> np.ndarray:
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
         enc = self.tokenizer(
             texts,
             padding=True,
@@ -1,3 +1,4 @@
+import os
 import torch
 import torch.nn.functional as F
 from transformers import AutoTokenizer, AutoModel
@@ -26,6 +27,10 @@ class EntityMatcher:
         self.tokenizer = AutoTokenizer.from_pretrained(self.model_path)
         self.model = AutoModel.from_pretrained(self.model_path)
         self.model.to(self.device)
+        self.model.eval()
+        if os.getenv("BMG_TORCH_COMPILE") == "1":
+            # Opt-in: padded batch lengths vary, so compile with dynamic shapes
+            self.model = torch.compile(self.model, dynamic=True)
 
     def load_embeddings(self, embedding_file_path: str) -> None:
         """
@@ -73,7 +78,7 @@ class EntityMatcher:
 
         inputs = self.tokenizer(query, return_tensors='pt', padding=True, truncation=True).to(self.device)
 
-        with torch.no_grad():
+        with torch.inference_mode():
             outputs = self.model(**inputs)
 
         query_embedding = outputs.last_hidden_state[:, 0, :].cpu()  
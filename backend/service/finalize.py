@@ -1,8 +1,10 @@
 import os
 import glob
+from functools import lru_cache
 import numpy as np
 import pandas as pd
 from sklearn.preprocessing import StandardScaler
+from backend.utils.io import write_csv
 
 def merge_data_and_generate_entity_mapping(cache_folder, file_order, apply_zscore=False):
     processed_data_path = os.path.join(cache_folder, 'processed_data/')
@@ -11,28 +13,39 @@ def merge_data_and_generate_entity_mapping(cache_folder, file_order, apply_zscor
     print('File order:', file_order)
 
     # Step 1: Merge npy feature files 
-    merged_data = None
+    data_arrays = []
     for file_name in file_order:
         npy_file_path = os.path.join(cache_folder, "_x", f"{file_name}.npy")
         if os.path.exists(npy_file_path):
-            data_array = np.load(npy_file_path)
+            # Memory-mapped: untouched blocks are copied straight into the merged matrix
+            data_array = np.load(npy_file_path, mmap_mode="r")
             
             if apply_zscore:
                 print(f"Applying z-score normalization to {npy_file_path}")
                 scaler = StandardScaler()
                 data_array = scaler.fit_transform(data_array)
 
-            merged_data = data_array if merged_data is None else np.concatenate((merged_data, data_array), axis=1)
+            data_arrays.append(data_array)
         else:
             print(f"Warning: {npy_file_path} does not exist.")
 
-    if merged_data is None:
+    if not data_arrays:
         print("No data merged. Exiting.")
         return None, None, processed_data_path
 
-    # Step 2: Save merged feature matrix
+    # Step 2: Write the merged feature matrix straight into xAll.npy (memory-mapped),
+    # filling column blocks in order instead of building it in RAM and saving a copy
     x_all_path = os.path.join(processed_data_path, 'xAll.npy')
-    np.save(x_all_path, merged_data)
+    n_rows = data_arrays[0].shape[0]
+    total_cols = sum(a.shape[1] for a in data_arrays)
+    merged_data = np.lib.format.open_memmap(
+        x_all_path, mode="w+", dtype=np.result_type(*data_arrays), shape=(n_rows, total_cols)
+    )
+    col = 0
+    for data_array in data_arrays:
+        merged_data[:, col:col + data_array.shape[1]] = data_array
+        col += data_array.shape[1]
+    merged_data.flush()
     print(f"Merged feature matrix saved to: {x_all_path}")
 
     # Step 3: Load label data (.npy) instead of .csv
@@ -48,7 +61,7 @@ def merge_data_and_generate_entity_mapping(cache_folder, file_order, apply_zscor
     print(f"Loaded label data from {label_npy_path}")
 
     y_all_path = os.path.join(processed_data_path, 'yAll.npy')
-    np.save(y_all_path, labels)
+    np.save(y_all_path, labels, allow_pickle=False)
     print(f"Label matrix saved to: {y_all_path}")
 
     # Step 4: Load and concatenate ID mapping files
@@ -66,23 +79,27 @@ def merge_data_and_generate_entity_mapping(cache_folder, file_order, apply_zscor
     full_mapping_df = full_mapping_df[["Index", "Original_ID", "BioMedGraphica_Conn_ID"]]
 
     entity_mapping_path = os.path.join(processed_data_path, 'entity_index_id_mapping.csv')
-    full_mapping_df.to_csv(entity_mapping_path, index=False)
+    write_csv(full_mapping_df, entity_mapping_path)
     print(f"Entity ID mapping saved to: {entity_mapping_path}")
 
     return full_mapping_df, merged_data, processed_data_path
 
+@lru_cache(maxsize=1)
+def _load_edge_table(edge_csv_path, mtime):
+    """Projected relation table, parsed once per worker process (`mtime` invalidates the cache)."""
+    return pd.read_csv(edge_csv_path, usecols=['BMGC_From_ID', 'BMGC_To_ID', 'Type'], engine="pyarrow")
+
 def filter_and_save_edge_data(database_path, entity_index_id_mapping):
     """Filter edge data based on entity index and return unique types."""
     edge_csv_path = os.path.join(database_path, 'Relation', 'BioMedGraphica_Conn_Relation.csv')
-    edge_data_raw = pd.read_csv(edge_csv_path)
-
-    edge_data = edge_data_raw[['BMGC_From_ID', 'BMGC_To_ID', 'Type']].copy()
+    # Shared cached frame: only read from it, the boolean filter below makes the copy
+    edge_data = _load_edge_table(edge_csv_path, os.path.getmtime(edge_csv_path))
 
     # Filter edge data based on entity_index_id_mapping
     filtered_edge_data = edge_data[
         edge_data['BMGC_From_ID'].isin(entity_index_id_mapping['BioMedGraphica_Conn_ID']) &
         edge_data['BMGC_To_ID'].isin(entity_index_id_mapping['BioMedGraphica_Conn_ID'])
-    ].copy()
+    ]
 
     # Get unique types from the filtered edge data
     unique_types = filtered_edge_data['Type'].unique().tolist()
@@ -95,10 +112,30 @@ def process_edge_data_with_selected_types(filtered_edge_data, selected_types, en
     # Filter edge data based on selected types
     filtered_edge_data = filtered_edge_data[filtered_edge_data['Type'].isin(selected_types)]
     
-    # Create From_Index and To_Index columns
-    entity_index = pd.Series(entity_index_id_mapping['Index'].values, index=entity_index_id_mapping['BioMedGraphica_Conn_ID'])
-    filtered_edge_data.loc[:, 'From_Index'] = filtered_edge_data['BMGC_From_ID'].map(entity_index)
-    filtered_edge_data.loc[:, 'To_Index'] = filtered_edge_data['BMGC_To_ID'].map(entity_index)
+    # Create From_Index and To_Index columns: binary search over the sorted entity IDs
+    conn_ids = entity_index_id_mapping['BioMedGraphica_Conn_ID'].to_numpy().astype(str)
+    order = np.argsort(conn_ids, kind="stable")
+    sorted_ids = conn_ids[order]
+    sorted_index = entity_index_id_mapping['Index'].to_numpy()[order]
+
+    def to_index(ids):
+        """Index of each ID in the mapping, plus a mask of the IDs actually found there."""
+        ids = ids.to_numpy().astype(str)
+        if len(sorted_ids) == 0:
+            return np.zeros(len(ids), dtype=sorted_index.dtype), np.zeros(len(ids), dtype=bool)
+        pos = np.minimum(np.searchsorted(sorted_ids, ids), len(sorted_ids) - 1)
+        return sorted_index[pos], sorted_ids[pos] == ids
+
+    from_idx, from_found = to_index(filtered_edge_data['BMGC_From_ID'])
+    to_idx, to_found = to_index(filtered_edge_data['BMGC_To_ID'])
+    found = from_found & to_found
+    if not found.all():
+        # searchsorted returns an insertion point, not a match: drop edges whose endpoints aren't mapped
+        print(f"[WARN] Dropping {int((~found).sum())} edges with endpoints missing from the entity mapping")
+    filtered_edge_data = filtered_edge_data[found].assign(
+        From_Index=from_idx[found],
+        To_Index=to_idx[found],
+    )
     
     # Sort the edge data by From_Index
     filtered_edge_data = filtered_edge_data.sort_values(by=['From_Index'])
@@ -106,24 +143,30 @@ def process_edge_data_with_selected_types(filtered_edge_data, selected_types, en
     ppi_edge_data = filtered_edge_data[filtered_edge_data["Type"] == "Protein-Protein"]
     internal_edge_data = filtered_edge_data[filtered_edge_data["Type"] != "Protein-Protein"]
 
+    def stacked_edge_index(edges):
+        # (2, E) int64 straight from the two index columns, no transposed DataFrame
+        return np.stack([
+            edges['From_Index'].to_numpy(dtype=np.int64),
+            edges['To_Index'].to_numpy(dtype=np.int64),
+        ])
+
     # Save edge_index as a NumPy array
-    edge_index = filtered_edge_data[['From_Index', 'To_Index']].T
-    np.save(os.path.join(processed_data_path, 'edge_index.npy'), edge_index.to_numpy().astype(np.int64))
+    np.save(os.path.join(processed_data_path, 'edge_index.npy'), stacked_edge_index(filtered_edge_data))
 
     # Export PPI edges
     if not ppi_edge_data.empty:
-        ppi_edge_index = ppi_edge_data[['From_Index', 'To_Index']].T.to_numpy().astype(np.int64)
+        ppi_edge_index = stacked_edge_index(ppi_edge_data)
         np.save(os.path.join(processed_data_path, 'ppi_edge_index.npy'), ppi_edge_index)
         print("Saved: ppi_edge_index.npy")
 
     # Export internal edges
     if not internal_edge_data.empty:
-        internal_edge_index = internal_edge_data[['From_Index', 'To_Index']].T.to_numpy().astype(np.int64)
+        internal_edge_index = stacked_edge_index(internal_edge_data)
         np.save(os.path.join(processed_data_path, 'internal_edge_index.npy'), internal_edge_index)
         print("Saved: internal_edge_index.npy")
 
     # Save the filtered edge data with BioMedGraphica_Conn_ID
-    filtered_edge_data.to_csv(os.path.join(processed_data_path, 'filtered_edge_id_index_data.csv'), index=False)
+    write_csv(filtered_edge_data, os.path.join(processed_data_path, 'filtered_edge_id_index_data.csv'))
     edge_type_counts = (
         filtered_edge_data["Type"].value_counts().sort_index().to_dict()
         if not filtered_edge_data.empty
@@ -166,7 +209,7 @@ def generate_name_and_desc_csvs(cache_dir, file_order, out_dir):
     if len(name_frames) > 0:
         s_name = pd.concat(name_frames, ignore_index=True)
         s_name_path = os.path.join(out_dir, "s_name.csv")
-        s_name.to_csv(s_name_path, index=False)
+        write_csv(s_name, s_name_path)
         print(f"Saved: {s_name_path}")
     else:
         print("No name CSVs were found to concatenate.")
@@ -174,7 +217,7 @@ def generate_name_and_desc_csvs(cache_dir, file_order, out_dir):
     if len(desc_frames) > 0:
         s_desc = pd.concat(desc_frames, ignore_index=True)
         s_desc_path = os.path.join(out_dir, "s_desc.csv")
-        s_desc.to_csv(s_desc_path, index=False)
+        write_csv(s_desc, s_desc_path)
         print(f"Saved: {s_desc_path}")
     else:
         print("No desc CSVs were found to concatenate.")
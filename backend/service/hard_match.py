@@ -1,11 +1,106 @@
 import os
 import pandas as pd
 import numpy as np
-from backend.utils.io import _load_bmg_csv, save_name_and_desc
+from backend.utils.io import _load_bmg_csv, save_name_and_desc, read_feature_columns, read_feature_table, write_csv_if_changed
+
+# Optional: fused NaN-aware per-group sums/counts in one parallel pass (no masked temporaries)
+try:
+    from numba import njit, prange
+
+    @njit(parallel=True, nogil=True, cache=True)
+    def _grouped_sums_counts(values, codes, n_groups):
+        n_rows, n_cols = values.shape
+        sums = np.zeros((n_rows, n_groups), np.float64)
+        counts = np.zeros((n_rows, n_groups), np.int64)
+        for i in prange(n_rows):
+            for j in range(n_cols):
+                v = values[i, j]
+                if not np.isnan(v):
+                    sums[i, codes[j]] += v
+                    counts[i, codes[j]] += 1
+        return sums, counts
+except ImportError:
+    _grouped_sums_counts = None
+
+def _mean_by_bmg_id(df, mapping_df):
+    """
+    Sample x BioMedGraphica_Conn_ID mean matrix straight from the wide input table.
+    Same result as melt -> merge -> pivot_table(mean, fill_value=0), without the long format:
+    mapped columns are grouped per BMG ID (numba kernel when available, else np.add.reduceat),
+    duplicate samples with a row groupby.
+    """
+    if mapping_df.empty:
+        # Nothing mapped: the caller's reindex turns this into an all-zero matrix
+        return pd.DataFrame(index=pd.Index([], name="Sample_ID"))
+
+    # Group on integer codes rather than comparing/sorting ID strings
+    codes, bmg_uniques = pd.factorize(mapping_df["BioMedGraphica_Conn_ID"], sort=True)
+    order = np.argsort(codes, kind="stable")
+    codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+
+    # float32 working copy halves the memory of the selected block; sums accumulate in float64.
+    # pandas hands the block back column-major, so each feature column is already contiguous
+    # (forcing another layout would cost a full copy for no measurable gain)
+    values = df[mapping_df["Original_ID"].to_numpy()[order]].to_numpy(dtype=np.float32)
+    if _grouped_sums_counts is not None:
+        sums, counts = _grouped_sums_counts(values, codes, len(bmg_uniques))
+    else:
+        present = ~np.isnan(values)
+        sums = np.add.reduceat(np.where(present, values, np.float32(0)), starts, axis=1, dtype=np.float64)
+        counts = np.add.reduceat(present, starts, axis=1, dtype=np.int64)
+
+    sample_index = pd.Index(df["Sample_ID"], name="Sample_ID")
+    columns = pd.Index(bmg_uniques[codes[starts]], name="BioMedGraphica_Conn_ID")
+    # Caller reindexes to the common sample order, so group keys need no sorting
+    sums = pd.DataFrame(sums, index=sample_index, columns=columns).groupby(level=0, sort=False, observed=True).sum()
+    counts = pd.DataFrame(counts, index=sample_index).groupby(level=0, sort=False, observed=True).sum()
+
+    # No observed value for a (sample, BMG ID) cell -> 0, like pivot_table's fill_value
+    sum_values = sums.to_numpy()
+    means = np.divide(sum_values, counts.to_numpy(), out=np.zeros_like(sum_values), where=counts.to_numpy() > 0)
+    return pd.DataFrame(means, index=sums.index, columns=columns)
+
+def _build_id_map(mapping_df, bmg_ids):
+    """
+    raw_id_mapping table: every BMG ID in `bmg_ids` order with its sorted, ';'-joined
+    Original_IDs ("" when unmapped). Groups on factorized codes instead of a per-group lambda.
+    """
+    original = mapping_df["Original_ID"].astype(str)
+    keep = mapping_df["Original_ID"].notna() & mapping_df["BioMedGraphica_Conn_ID"].notna() & (original.str.strip() != "")
+    pairs = (
+        pd.DataFrame({"BioMedGraphica_Conn_ID": mapping_df["BioMedGraphica_Conn_ID"][keep], "Original_ID": original[keep]})
+        .drop_duplicates()
+        .sort_values("Original_ID", kind="stable")
+    )
+    codes, uniques = pd.factorize(pairs["BioMedGraphica_Conn_ID"])
+    joined = pairs["Original_ID"].groupby(codes, sort=True).agg(";".join)
+    joined.index = uniques
+    return pd.DataFrame({
+        "BioMedGraphica_Conn_ID": bmg_ids,
+        "Original_ID": joined.reindex(bmg_ids, fill_value="").to_numpy(),
+    })
+
+def _read_mapped_features(file_path, header, mapped_columns, sample_ids=None):
+    """
+    Read only the sample column and the `mapped_columns` of an uploaded table (header from
+    read_feature_columns), with Sample_ID integer-coded against the common IDs when given.
+    """
+    df = read_feature_table(file_path, usecols=[header[0]] + [c for c in header[1:] if c in mapped_columns], id_col=header[0])
+    df.rename(columns={header[0]: "Sample_ID"}, inplace=True)
+    if sample_ids is not None:
+        # Integer-coded against the common IDs: the row groupby works on codes, not strings
+        # (IDs outside the common set get code -1, i.e. NaN)
+        df["Sample_ID"] = pd.Categorical.from_codes(
+            pd.Index(sample_ids).get_indexer(df["Sample_ID"]), categories=sample_ids
+        )
+    return df
 
 def process_entity_hard_match(entity_type, id_type, file_path, feature_label, database_path, fill0=False, sample_ids=None, output_dir="cache"):
     entity_type = entity_type.capitalize()
-    entity_data = _load_bmg_csv(database_path, entity_type)
+    # Only the ID columns are used; fill0 needs just the Conn IDs
+    id_columns = ["BioMedGraphica_Conn_ID"] if fill0 else [id_type, "BioMedGraphica_Conn_ID"]
+    entity_data = _load_bmg_csv(database_path, entity_type, usecols=id_columns)
     bmg_ids = entity_data["BioMedGraphica_Conn_ID"].drop_duplicates().tolist()
 
     os.makedirs(os.path.join(output_dir, "_x"), exist_ok=True)
@@ -15,17 +110,13 @@ def process_entity_hard_match(entity_type, id_type, file_path, feature_label, da
         print(f"Filling zeros for {feature_label} with {len(sample_ids)}samples and {len(bmg_ids)} BioMedGraphica IDs...")
         if sample_ids is None:
             raise ValueError("sample_ids must be provided when fill0=True")
-        data_matrix = pd.DataFrame(0, index=sample_ids, columns=bmg_ids)
-        data_matrix.index.name = "Sample_ID"
-        data_matrix.reset_index(inplace=True)
-        data_matrix["Sample_ID"] = data_matrix["Sample_ID"].astype(str)
-        np.save(os.path.join(output_dir, "_x", f"{feature_label.lower()}.npy"), data_matrix.drop(columns=["Sample_ID"]).values)
-        # data_matrix.to_csv(os.path.join(output_dir, "_x", f"{feature_label.lower()}.csv"), index=False)
+        # Only the values are saved, so skip the frame (and its Sample_ID insert/drop copies)
+        np.save(os.path.join(output_dir, "_x", f"{feature_label.lower()}.npy"), np.zeros((len(sample_ids), len(bmg_ids)), dtype=np.int64))
         mapping_df = pd.DataFrame({
             "BioMedGraphica_Conn_ID": bmg_ids,
             "Original_ID": ["" for _ in bmg_ids],
         })
-        mapping_df.to_csv(os.path.join(output_dir, "raw_id_mapping", f"{feature_label.lower()}_id_map.csv"), index=False)
+        write_csv_if_changed(mapping_df, os.path.join(output_dir, "raw_id_mapping", f"{feature_label.lower()}_id_map.csv"))
 
         save_name_and_desc(
             database_path,
@@ -41,13 +132,8 @@ def process_entity_hard_match(entity_type, id_type, file_path, feature_label, da
             "mapped_count": len(bmg_ids),
         }
 
-    sep = "\t" if file_path.endswith((".tsv", ".txt")) else ","
-    df = pd.read_csv(file_path, sep=sep)
-    df.rename(columns={df.columns[0]: "Sample_ID"}, inplace=True)
-    df["Sample_ID"] = df["Sample_ID"].astype(str)
-
-    melted = df.melt(id_vars="Sample_ID", var_name="Original_ID", value_name="value")
-    used_ids = set(df.columns) - {"Sample_ID"}
+    header = read_feature_columns(file_path)
+    used_ids = set(header[1:])
 
     mapping_raw = entity_data[[id_type, "BioMedGraphica_Conn_ID"]].dropna()
     mapping_raw[id_type] = mapping_raw[id_type].astype(str).str.strip()
@@ -57,21 +143,21 @@ def process_entity_hard_match(entity_type, id_type, file_path, feature_label, da
     mapping_df = mapping_df[["Original_ID", "BioMedGraphica_Conn_ID"]].drop_duplicates()
     mapped_original_id_count = mapping_df["Original_ID"].nunique()
 
-    print(f"[DEBUG] mapping_df rows: {len(mapping_df)}")
+    # Only the sample column and the mapped feature columns are parsed
+    df = _read_mapped_features(file_path, header, set(mapping_df["Original_ID"]), sample_ids)
 
-    merged = pd.merge(melted, mapping_df, on="Original_ID", how="inner")
+    print(f"[DEBUG] mapping_df rows: {len(mapping_df)}")
 
-    print(f"[DEBUG] merged shape: {merged.shape}")
+    expr = _mean_by_bmg_id(df, mapping_df)
 
-    expr = merged.pivot_table(index="Sample_ID", columns="BioMedGraphica_Conn_ID", values="value", fill_value=0)
+    print(f"[DEBUG] expr shape: {expr.shape}")
     
     # print(f"[DEBUG] Before reindex - expr shape: {expr.shape}")
     # print(f"[DEBUG] expr.index (first 5): {list(expr.index[:5])}")
     # print(f"[DEBUG] sample_ids (first 5): {sample_ids[:5]}")
     # print(f"[DEBUG] expr non-zero values count: {(expr != 0).sum().sum()}")
 
-    common_samples = set(expr.index) & set(sample_ids)
-    # print(f"[DEBUG] Common samples count: {len(common_samples)} / {len(sample_ids)}")
+    # print(f"[DEBUG] Common samples count: {len(set(expr.index) & set(sample_ids))} / {len(sample_ids)}")
     
     expr = expr.reindex(index=sample_ids, columns=bmg_ids, fill_value=0)
     
@@ -82,16 +168,9 @@ def process_entity_hard_match(entity_type, id_type, file_path, feature_label, da
     np.save(os.path.join(output_dir, "_x", f"{feature_label.lower()}.npy"), expr.values)
     # expr.to_csv(os.path.join(output_dir, "_x", f"{feature_label.lower()}.csv"))
 
-    grouped_mapping_df = (
-        mapping_df.groupby("BioMedGraphica_Conn_ID")["Original_ID"]
-        .apply(lambda x: ";".join(sorted(set(str(i) for i in x if pd.notna(i) and str(i).strip()))))
-        .reset_index()
-    )
-    final_mapping_df = pd.DataFrame({"BioMedGraphica_Conn_ID": bmg_ids}).merge(
-        grouped_mapping_df, on="BioMedGraphica_Conn_ID", how="left"
-    ).fillna({"Original_ID": ""})
+    final_mapping_df = _build_id_map(mapping_df, bmg_ids)
 
-    final_mapping_df.to_csv(os.path.join(output_dir, "raw_id_mapping", f"{feature_label.lower()}_id_map.csv"), index=False)
+    write_csv_if_changed(final_mapping_df, os.path.join(output_dir, "raw_id_mapping", f"{feature_label.lower()}_id_map.csv"))
 
     save_name_and_desc(
         database_path,
@@ -3,8 +3,9 @@ import pandas as pd
 import numpy as np
 import json
 
+from backend.service.hard_match import _build_id_map, _mean_by_bmg_id, _read_mapped_features
 from backend.service.matcher_loader import load_matcher
-from backend.utils.io import _load_bmg_conn_ids, save_name_and_desc
+from backend.utils.io import _load_bmg_conn_ids, save_name_and_desc, read_feature_columns, write_csv_if_changed
 
 def generate_soft_match_candidates(
     entity_type,
@@ -26,12 +27,8 @@ def generate_soft_match_candidates(
         model_path=matcher_model_path,
     )
 
-    sep = "\t" if file_path.endswith((".tsv", ".txt")) else ","
-    df = pd.read_csv(file_path, sep=sep)
-    df.rename(columns={df.columns[0]: "Sample_ID"}, inplace=True)
-
-    melted = df.melt(id_vars="Sample_ID", var_name="Original_ID", value_name="value")
-    used_ids = sorted(set(melted["Original_ID"].astype(str)))
+    # Candidates only need the feature names: read the header, not the values
+    used_ids = sorted(set(read_feature_columns(file_path)[1:]))
 
     raw_results = matcher.match_many(
         queries=used_ids,
@@ -79,18 +76,10 @@ def apply_soft_match_selection(
     os.makedirs(os.path.join(output_dir, "_x"), exist_ok=True)
     os.makedirs(os.path.join(output_dir, "raw_id_mapping"), exist_ok=True)
 
-    sep = "\t" if file_path.endswith((".tsv", ".txt")) else ","
-    df = pd.read_csv(file_path, sep=sep)
-    df.rename(columns={df.columns[0]: "Sample_ID"}, inplace=True)
-    df["Sample_ID"] = df["Sample_ID"].astype(str)
-
-    melted = df.melt(id_vars="Sample_ID", var_name="Original_ID", value_name="value")
-    used_ids = sorted(set(melted["Original_ID"]))
-
     # Build raw mapping based on user selections
-    mapping_df = pd.DataFrame(
+    mapping_df = pd.DataFrame.from_records(
         [
-            {"Original_ID": oid, "BioMedGraphica_Conn_ID": bmg_id}
+            (oid, bmg_id)
             for oid, bmg_id in user_selections.items()
             if bmg_id  # not None / not empty
         ],
@@ -104,13 +93,9 @@ def apply_soft_match_selection(
             "Original_ID": [""] * len(bmg_ids)
         })
 
-        final_mapping_df.to_csv(
-            os.path.join(output_dir, "raw_id_mapping", f"{feature_label.lower()}_id_map.csv"),
-            index=False
-        )
+        write_csv_if_changed(final_mapping_df, os.path.join(output_dir, "raw_id_mapping", f"{feature_label.lower()}_id_map.csv"))
 
-        data_matrix = pd.DataFrame(0, index=sample_ids, columns=bmg_ids)
-        np.save(os.path.join(output_dir, "_x", f"{feature_label.lower()}.npy"), data_matrix.values)
+        np.save(os.path.join(output_dir, "_x", f"{feature_label.lower()}.npy"), np.zeros((len(sample_ids), len(bmg_ids)), dtype=np.int64))
 
         # Optional but recommended: still save names/descriptions for consistency
         save_name_and_desc(
@@ -127,26 +112,13 @@ def apply_soft_match_selection(
             "message": "No mappings selected"
         }
 
-    # Group original IDs per BMG ID
-    grouped_mapping_df = (
-        mapping_df.groupby("BioMedGraphica_Conn_ID")["Original_ID"]
-        .apply(lambda x: ";".join(sorted(set(str(i) for i in x if pd.notna(i) and str(i).strip()))))
-        .reset_index()
-    )
+    # Group original IDs per BMG ID, over the full list of BMG IDs
+    final_mapping_df = _build_id_map(mapping_df, bmg_ids)
 
-    # Ensure full list of BMG IDs included
-    final_mapping_df = pd.DataFrame({"BioMedGraphica_Conn_ID": bmg_ids}).merge(
-        grouped_mapping_df, on="BioMedGraphica_Conn_ID", how="left"
-    ).fillna({"Original_ID": ""})
-
-    final_mapping_df.to_csv(
-        os.path.join(output_dir, "raw_id_mapping", f"{feature_label.lower()}_id_map.csv"),
-        index=False
-    )
+    write_csv_if_changed(final_mapping_df, os.path.join(output_dir, "raw_id_mapping", f"{feature_label.lower()}_id_map.csv"))
 
     if mapping_df.empty:
-        data_matrix = pd.DataFrame(0, index=sample_ids, columns=bmg_ids)
-        np.save(os.path.join(output_dir, "_x", f"{feature_label.lower()}.npy"), data_matrix.values)
+        np.save(os.path.join(output_dir, "_x", f"{feature_label.lower()}.npy"), np.zeros((len(sample_ids), len(bmg_ids)), dtype=np.int64))
         return {
             "feature_label": feature_label,
             "mapped_count": 0,
@@ -154,14 +126,20 @@ def apply_soft_match_selection(
             "message": "No mappings selected"
         }
 
-    melted["Original_ID"] = melted["Original_ID"].astype(str)
     mapping_df["Original_ID"] = mapping_df["Original_ID"].astype(str)
 
-    merged = pd.merge(melted, mapping_df, on="Original_ID", how="inner")
-    merged["value"] = pd.to_numeric(merged["value"], errors="coerce")
-    merged = merged.dropna(subset=["value"])
+    # Only selections whose column exists in the table contribute values,
+    # and only those columns (plus the sample column) are parsed
+    header = read_feature_columns(file_path)
+    value_pairs = mapping_df[mapping_df["Original_ID"].isin(header[1:])]
+    df = _read_mapped_features(file_path, header, set(value_pairs["Original_ID"]), sample_ids)
 
-    if merged.empty:
+    value_cols = value_pairs["Original_ID"].unique().tolist()
+    non_numeric = [c for c in value_cols if not pd.api.types.is_numeric_dtype(df[c])]
+    if non_numeric:
+        df[non_numeric] = df[non_numeric].apply(pd.to_numeric, errors="coerce")
+
+    if not value_cols or not df[value_cols].notna().to_numpy().any():
         return {
             "feature_label": feature_label,
             "mapped_count": 0,
@@ -169,13 +147,7 @@ def apply_soft_match_selection(
             "error": "No valid numeric data after merging"
         }
 
-    expr = merged.pivot_table(
-        index="Sample_ID",
-        columns="BioMedGraphica_Conn_ID",
-        values="value",
-        fill_value=0,
-        aggfunc="mean"
-    )
+    expr = _mean_by_bmg_id(df, value_pairs)
 
     expr = expr.reindex(index=sample_ids, columns=bmg_ids, fill_value=0)
     np.save(os.path.join(output_dir, "_x", f"{feature_label.lower()}.npy"), expr.values)
@@ -1,8 +1,9 @@
 # backend/tasks/steps.py
 
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, reduce
 import numpy as np
-import pandas as pd
 import json
 import redis
 import logging
@@ -12,7 +13,7 @@ from backend.service.hard_match import process_entity_hard_match
 from backend.service.soft_match import generate_soft_match_candidates, apply_soft_match_selection
 from backend.service.finalize import finalize
 from backend.service.task_tracker import update_task_status
-from backend.utils.io import read_sample_ids_for_entity, load_common_ids_from_redis, find_entity_cfg_by_label, load_mappings_from_redis
+from backend.utils.io import read_sample_ids_for_entity, read_feature_columns, read_feature_table, load_common_ids_from_redis, find_entity_cfg_by_label, load_mappings_from_redis, invalidate_job_cache, json_dumps
 from backend.config import Config
 
 r = redis.Redis()
@@ -38,10 +39,8 @@ def _collect_entity_input_stats(entities_cfgs):
             entity_stats.append(stat_item)
             continue
 
-        sep = "\t" if file_path.endswith((".tsv", ".txt")) else ","
-        df = pd.read_csv(file_path, sep=sep, nrows=0)
         stat_item["input_source"] = "file"
-        stat_item["input_feature_count"] = max(len(df.columns) - 1, 0)
+        stat_item["input_feature_count"] = max(len(read_feature_columns(file_path)) - 1, 0)
         entity_stats.append(stat_item)
 
     return entity_stats
@@ -50,21 +49,31 @@ def _collect_entity_input_stats(entities_cfgs):
 def compute_common_id_task(entities_cfgs, job_id):
     print(f"[compute_common] job: {job_id}")
     
-    sample_sets = []
-
-    for cfg in entities_cfgs:
-        if not cfg.get("fill0", False) and cfg["entity_type"].lower() != "label":
-            sample_ids = read_sample_ids_for_entity(cfg["file_path"])
-            sample_sets.append(set(sample_ids))
-
-    if not sample_sets:
+    file_paths = [
+        cfg["file_path"]
+        for cfg in entities_cfgs
+        if not cfg.get("fill0", False) and cfg["entity_type"].lower() != "label"
+    ]
+
+    def _sorted_sample_ids(file_path):
+        # Sorted unique array per file, so the intersection below is a sorted merge
+        return np.unique(np.asarray(read_sample_ids_for_entity(file_path), dtype=str))
+
+    # The Arrow CSV reader releases the GIL, so entity files are parsed concurrently
+    sample_arrays = []
+    if file_paths:
+        with ThreadPoolExecutor(max_workers=min(8, len(file_paths))) as executor:
+            sample_arrays = list(executor.map(_sorted_sample_ids, file_paths))
+
+    if not sample_arrays:
         raise ValueError("No valid input files found to compute sample ID intersection.")
 
-    common_ids = sorted(list(set.intersection(*sample_sets)))
+    common_ids = reduce(partial(np.intersect1d, assume_unique=True), sample_arrays).tolist()
 
-    r.set(f"common_ids:{job_id}", json.dumps(common_ids))
+    r.set(f"common_ids:{job_id}", json_dumps(common_ids))
+    invalidate_job_cache(job_id)
     entity_input_stats = _collect_entity_input_stats(entities_cfgs)
-    r.set(f"entity_input_stats:{job_id}", json.dumps(entity_input_stats))
+    r.set(f"entity_input_stats:{job_id}", json_dumps(entity_input_stats))
 
     print(f"Common sample IDs for job `{job_id}`: {len(common_ids)} found")
     return {
@@ -93,8 +102,7 @@ def run_label_task(label_cfg, output_dir, job_id, common_ids=None):
             return {"feature_label": feature_label, "status": "error", "error": error}
 
         try:
-            sep = "\t" if file_path.endswith((".tsv", ".txt")) else ","
-            df = pd.read_csv(file_path, sep=sep)
+            df = read_feature_table(file_path, id_col=read_feature_columns(file_path)[0])
 
             if df.shape[1] < 2:
                 error = "Label file must contain at least two columns (sample ID + label)"
@@ -102,7 +110,6 @@ def run_label_task(label_cfg, output_dir, job_id, common_ids=None):
                 return {"feature_label": feature_label, "status": "error", "error": error}
 
             df.rename(columns={df.columns[0]: "Sample_ID"}, inplace=True)
-            df["Sample_ID"] = df["Sample_ID"].astype(str)
             df = df[df["Sample_ID"].isin(common_ids)]
             df.set_index("Sample_ID", inplace=True)
             label_col = df.columns[0]
@@ -2,21 +2,71 @@
 
 import os
 import time
+import hashlib
+import threading
+from functools import lru_cache
 import redis
 import json
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 import torch
 
+try:
+    import orjson
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except ImportError:
+    json_loads = json.loads
+    json_dumps = json.dumps
+
 r = redis.Redis(decode_responses=True)
 
+# Short-lived, size-bounded in-process cache of decoded Redis payloads:
+# {redis_key: (expires_at, value)}, oldest insert first
+_REDIS_CACHE_TTL = 5.0
+_REDIS_CACHE_MAXSIZE = 128
+_redis_cache: dict[str, tuple[float, object]] = {}
+_redis_cache_lock = threading.Lock()
+
+def _cache_get(redis_key: str):
+    with _redis_cache_lock:
+        hit = _redis_cache.get(redis_key)
+        if hit is None:
+            return None
+        expires_at, value = hit
+        if expires_at < time.monotonic():
+            _redis_cache.pop(redis_key, None)
+            return None
+        return value
+
+def _cache_set(redis_key: str, value) -> None:
+    now = time.monotonic()
+    with _redis_cache_lock:
+        # Evict on insert (expired entries, then the oldest over maxsize), so a long-lived
+        # API or Celery worker does not keep an entry per job it has ever seen
+        for key in [k for k, (expires_at, _) in _redis_cache.items() if expires_at < now]:
+            del _redis_cache[key]
+        _redis_cache.pop(redis_key, None)
+        while len(_redis_cache) >= _REDIS_CACHE_MAXSIZE:
+            del _redis_cache[next(iter(_redis_cache))]
+        _redis_cache[redis_key] = (now + _REDIS_CACHE_TTL, value)
+
+def invalidate_job_cache(job_id: str) -> None:
+    """Drop cached common IDs / mappings for a job after its Redis keys are rewritten."""
+    with _redis_cache_lock:
+        _redis_cache.pop(f"common_ids:{job_id}", None)
+        _redis_cache.pop(f"mappings:{job_id}", None)
+
 def read_sample_ids_for_entity(file_path: str, max_retries: int = 3, delay: float = 1) -> list[str]:
     sep = "\t" if file_path.endswith((".tsv", ".txt")) else ","
     
     for attempt in range(1, max_retries + 1):
         try:
-            df = pd.read_csv(file_path, sep=sep, usecols=[0])
-            first_col = df.columns[0]
-            return df[first_col].astype(str).tolist()
+            # Same reader and ID dtype as the feature reads, so numeric IDs keep their spelling
+            id_col = read_feature_columns(file_path)[0]
+            df = read_feature_table(file_path, usecols=[id_col], id_col=id_col)
+            return df[id_col].dropna().tolist()
         except Exception as e:
             print(f"[Retry {attempt}/{max_retries}] Failed to read `{file_path}`: {e}")
             if attempt == max_retries:
@@ -24,12 +74,150 @@ def read_sample_ids_for_entity(file_path: str, max_retries: int = 3, delay: floa
             time.sleep(delay)  # Wait before retrying
 
 
+def read_feature_columns(file_path: str) -> list[str]:
+    """Header of an uploaded sample x feature table (first entry is the sample ID column)."""
+    sep = "\t" if file_path.endswith((".tsv", ".txt")) else ","
+    return pd.read_csv(file_path, sep=sep, nrows=0).columns.tolist()
+
+
+def read_feature_table(file_path: str, usecols: list[str] | None = None, id_col: str | None = None) -> pd.DataFrame:
+    """
+    Read an uploaded sample x feature table with Arrow's multi-threaded CSV parser.
+    `usecols` projects the read onto the named columns; `id_col` is read as text, matching
+    read_sample_ids_for_entity (missing IDs stay NaN).
+    """
+    sep = "\t" if file_path.endswith((".tsv", ".txt")) else ","
+    dtype = {id_col: str} if id_col is not None else None
+    try:
+        if id_col is None:
+            return pd.read_csv(file_path, sep=sep, usecols=usecols, engine="pyarrow")
+        # pandas applies `dtype` after Arrow has already parsed the column (0042 -> 42), so type it up front
+        table = pa_csv.read_csv(
+            file_path,
+            parse_options=pa_csv.ParseOptions(delimiter=sep),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=usecols, column_types={id_col: pa.string()}, strings_can_be_null=True
+            ),
+        )
+        return table.to_pandas()
+    except Exception as e:
+        # Inputs the Arrow parser rejects (ragged rows, odd quoting) still load with the C engine
+        print(f"[WARN] pyarrow CSV engine failed for `{file_path}`, falling back: {e}")
+        return pd.read_csv(file_path, sep=sep, usecols=usecols, dtype=dtype)
+
+
+_CSV_NO_QUOTING = pa_csv.WriteOptions(include_header=False, quoting_style="none")
+_CSV_SPECIAL_CHARS = ',"\r\n'
+
+
+def _arrow_csv_frame(df: pd.DataFrame) -> pd.DataFrame | None:
+    """
+    `df` with float/bool columns pre-formatted the way `to_csv` prints them ("1.0", "True"),
+    or None when only pandas' writer gives the same output (anything that needs quoting).
+    """
+    if df.shape[1] == 0 or any(ch in str(col) for col in df.columns for ch in _CSV_SPECIAL_CHARS):
+        return None
+    if df.shape[1] == 1:
+        # csv quotes an empty lone field as "", which an unquoted writer cannot produce
+        col = df.iloc[:, 0]
+        if (col.isna() | (col.astype(str) == "")).any():
+            return None
+
+    columns = {}
+    for name, col in df.items():
+        if pd.api.types.is_bool_dtype(col) or pd.api.types.is_float_dtype(col):
+            columns[name] = col.astype(str).where(col.notna())
+        elif pd.api.types.is_integer_dtype(col):
+            columns[name] = col
+        elif pd.api.types.is_string_dtype(col) or pd.api.types.is_object_dtype(col):
+            if col.str.contains(f"[{_CSV_SPECIAL_CHARS}]", regex=True, na=False).any():
+                return None
+            columns[name] = col
+        else:
+            return None
+    return pd.DataFrame(columns, index=df.index)
+
+
+def write_csv(df: pd.DataFrame, path: str) -> None:
+    """
+    Write `df` (without its index) with Arrow's C++ CSV writer instead of pandas' row loop.
+    The output is byte-identical to `to_csv(index=False)`; frames that need quoting are
+    detected up front and written by pandas directly.
+    """
+    frame = _arrow_csv_frame(df)
+    if frame is None:
+        df.to_csv(path, index=False)
+        return
+    try:
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        with open(path, "wb") as f:
+            # Arrow always quotes its own header row, so write it unquoted here
+            f.write((",".join(map(str, df.columns)) + "\n").encode())
+            pa_csv.write_csv(table, f, write_options=_CSV_NO_QUOTING)
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+        # Mixed-type object columns
+        print(f"[WARN] Arrow CSV writer cannot write `{path}`, falling back: {e}")
+        df.to_csv(path, index=False)
+
+
+def _frame_digest(df: pd.DataFrame) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update("\x1f".join(map(str, df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+# Digests of CSVs written by write_csv_if_changed live in Redis, so nothing extra lands in the job output
+_CSV_DIGEST_TTL = 24 * 3600
+
+def write_csv_if_changed(df: pd.DataFrame, path: str) -> bool:
+    """
+    `write_csv`, skipped when `path` still holds the same table. The content hash is stored in
+    Redis together with the file's size/mtime, so a missing record or a file changed since it was
+    written forces a rewrite. Returns True when the file was written.
+    """
+    digest = _frame_digest(df)
+    redis_key = f"csv_digest:{os.path.abspath(path)}"
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        stat = None
+
+    if stat is not None:
+        try:
+            raw = r.get(redis_key)
+        except redis.RedisError as e:
+            print(f"[WARN] Could not read CSV digest for `{path}`: {e}")
+            raw = None
+        if raw and json_loads(raw) == {"digest": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}:
+            print(f"[INFO] `{os.path.basename(path)}` unchanged, reused")
+            return False
+
+    write_csv(df, path)
+    stat = os.stat(path)
+    try:
+        r.set(
+            redis_key,
+            json_dumps({"digest": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}),
+            ex=_CSV_DIGEST_TTL,
+        )
+    except redis.RedisError as e:
+        print(f"[WARN] Could not store CSV digest for `{path}`: {e}")
+    return True
+
+
 def load_common_ids_from_redis(job_id: str) -> list[str]:
     redis_key = f"common_ids:{job_id}"
+    cached = _cache_get(redis_key)
+    if cached is not None:
+        return cached
+
     value = r.get(redis_key)
     if value is None:
         raise ValueError(f"Common IDs not found for job {job_id}")
-    return json.loads(value)
+    common_ids = json_loads(value)
+    _cache_set(redis_key, common_ids)
+    return common_ids
 
 def find_entity_cfg_by_label(cfgs: list[dict], feature_label: str) -> dict:
     for cfg in cfgs:
@@ -39,22 +227,33 @@ def find_entity_cfg_by_label(cfgs: list[dict], feature_label: str) -> dict:
 
 def load_mappings_from_redis(job_id: str) -> list[dict]:
     redis_key = f"mappings:{job_id}"
+    cached = _cache_get(redis_key)
+    if cached is not None:
+        return cached
+
     raw = r.get(redis_key)
     if not raw:
         # Return empty list if no mappings found (for hard match only scenarios)
         return []
 
     try:
-        mappings = json.loads(raw)
+        mappings = json_loads(raw)
         if not isinstance(mappings, list):
             raise ValueError(f"Expected list but got {type(mappings)}")
+        _cache_set(redis_key, mappings)
         return mappings
     except json.JSONDecodeError:
         raise ValueError(f"Redis data for job_id {job_id} is not valid JSON")
     except Exception as e:
         raise ValueError(f"Unexpected error parsing mappings for job_id {job_id}: {e}")
 
-def _load_bmg_csv(database_path, entity_type):
+# Full entity tables are large: keep at most a few per worker process (11 entity types exist)
+@lru_cache(maxsize=4)
+def _read_bmg_csv_cached(path: str, mtime: float) -> pd.DataFrame:
+    """Parse a BioMedGraphica table once per worker process (`mtime` invalidates)."""
+    return pd.read_csv(path)
+
+def _load_bmg_csv(database_path, entity_type, usecols=None):
     path = os.path.join(
         database_path,
         "Entity",
@@ -63,7 +262,15 @@ def _load_bmg_csv(database_path, entity_type):
     )
     if not os.path.exists(path):
         raise FileNotFoundError(f"Mapping file not found: {path}")
-    return pd.read_csv(path)
+    # Shared cached frame: callers must only read from it. Only the full table is cached;
+    # `usecols` is a projection of it, so column subsets never pin a second copy
+    df = _read_bmg_csv_cached(path, os.path.getmtime(path))
+    if usecols:
+        missing = [c for c in dict.fromkeys(usecols) if c not in df.columns]
+        if missing:
+            raise ValueError(f"Usecols do not match columns, columns expected but not found: {missing}")
+        df = df[list(dict.fromkeys(usecols))]
+    return df
 
 def _load_bmg_conn_ids(database_path, entity_type) -> list[str]:
     """
@@ -119,10 +326,7 @@ def save_name_and_desc(database_path, entity_type, output_dir, feature_label):
         name_df = _load_bmg_name_csv(database_path, entity_type)
         if "BioMedGraphica_Conn_ID" in name_df.columns and "Names_and_IDs" in name_df.columns:
             name_df = name_df[["BioMedGraphica_Conn_ID", "Names_and_IDs"]]
-            name_df.to_csv(
-                os.path.join(output_dir, "_x", f"{feature_label.lower()}_name.csv"),
-                index=False
-            )
+            write_csv(name_df, os.path.join(output_dir, "_x", f"{feature_label.lower()}_name.csv"))
     except FileNotFoundError as e:
         print(f"[WARN] {entity_type} Name file not found: {e}")
 
@@ -131,9 +335,6 @@ def save_name_and_desc(database_path, entity_type, output_dir, feature_label):
         desc_df = _load_bmg_desc_csv(database_path, entity_type)
         if "BioMedGraphica_Conn_ID" in desc_df.columns and "Description" in desc_df.columns:
             desc_df = desc_df[["BioMedGraphica_Conn_ID", "Description"]]
-            desc_df.to_csv(
-                os.path.join(output_dir, "_x", f"{feature_label.lower()}_desc.csv"),
-                index=False
-            )
+            write_csv(desc_df, os.path.join(output_dir, "_x", f"{feature_label.lower()}_desc.csv"))
     except FileNotFoundError as e:
         print(f"[WARN] {entity_type} Description file not found: {e}")
\ No newline at end of file
@@ -1,7 +1,9 @@
+import os
 from pathlib import Path
 import shutil
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, Any
 
@@ -29,15 +31,19 @@ class TempManager:
 
     def get_job_info(self, job_id: str) -> Dict[str, Any]:
         """Return metadata about the job."""
-        job_dir = self.get_job_dir(job_id, create_if_missing=False)
-        if not job_dir.exists():
+        job_dir = self.temp_root / job_id
+        try:
+            dir_stat = job_dir.stat()
+        except FileNotFoundError:
             return {"exists": False}
-        created_at = datetime.fromtimestamp(job_dir.stat().st_mtime)
+        with os.scandir(job_dir) as it:
+            files = [entry.name for entry in it]
+        created_at = datetime.fromtimestamp(dir_stat.st_mtime)
         return {
             "job_id": job_id,
             "path": str(job_dir),
             "created_at": created_at.isoformat(),
-            "files": [f.name for f in job_dir.glob("*")],
+            "files": files,
         }
 
     def delete_job(self, job_id: str) -> bool:
@@ -50,7 +56,10 @@ class TempManager:
 
     def list_all_jobs(self) -> list:
         """List all job IDs in the temp folder."""
-        return [d.name for d in self.temp_root.glob("job_*") if d.is_dir()]
+        if not self.temp_root.is_dir():
+            return []
+        with os.scandir(self.temp_root) as it:
+            return [e.name for e in it if e.name.startswith("job_") and e.is_dir()]
 
     def get_job_age_seconds(self, job_id: str) -> float:
         """Return job age in seconds."""
@@ -60,18 +69,30 @@ class TempManager:
         return -1.0
 
 
-def cleanup_old_jobs(temp_base: str = "temp", max_age_sec: int = 1800) -> int:
-    """Standalone function to clean up expired job folders."""
-    temp_path = Path(temp_base)
+def cleanup_old_jobs(temp_base: str = "temp", max_age_sec: int = 1800, max_workers: int = 8) -> int:
+    """Standalone function to clean up expired job folders.
+
+    Expired folders are collected in one scandir pass and then removed in
+    parallel; pass ``max_workers=1`` to delete them sequentially.
+    """
     now = time.time()
-    count = 0
+    expired_dirs = []
+
+    if not os.path.isdir(temp_base):
+        return 0
+
+    with os.scandir(temp_base) as it:
+        for entry in it:
+            if not entry.name.startswith("job_") or not entry.is_dir():
+                continue
+            if now - entry.stat().st_mtime > max_age_sec:
+                expired_dirs.append(entry.path)
 
-    for job_dir in temp_path.glob("job_*"):
-        if not job_dir.is_dir():
-            continue
-        age = now - job_dir.stat().st_mtime
-        if age > max_age_sec:
+    if max_workers <= 1 or len(expired_dirs) <= 1:
+        for job_dir in expired_dirs:
             shutil.rmtree(job_dir)
-            count += 1
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as ex:
+            list(ex.map(shutil.rmtree, expired_dirs))
 
-    return count
\ No newline at end of file
+    return len(expired_dirs)
\ No newline at end of file
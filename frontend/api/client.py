@@ -2,28 +2,66 @@
 
 from dotenv import load_dotenv
 import os
+import json
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except ImportError:
+    json_loads = json.loads
+    json_dumps = json.dumps
 
 load_dotenv()
 
 BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
 
+# (connect, read) seconds for every backend call, so a stalled backend cannot hang a rerun
+DEFAULT_TIMEOUT = (3.05, 30)
+
+# Pooled sessions: status polling reuses keep-alive connections instead of a new TCP
+# handshake per request. Only GET/HEAD are retried (connect, read and status errors, with backoff)
+_session = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.2, allowed_methods=frozenset({"GET", "HEAD"})),
+)
+_session.mount("http://", _adapter)
+_session.mount("https://", _adapter)
+
+# Submits go through their own pool with retries off: urllib3 retries connect errors whatever
+# the method, so a POST on the session above could reach the backend twice
+_post_session = requests.Session()
+_post_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=Retry(total=0, connect=0, read=False))
+_post_session.mount("http://", _post_adapter)
+_post_session.mount("https://", _post_adapter)
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+def _post_json(url: str, obj) -> requests.Response:
+    # Encode the body ourselves (orjson when available) instead of requests' stdlib json
+    return _post_session.post(url, data=json_dumps(obj), headers=_JSON_HEADERS, timeout=DEFAULT_TIMEOUT)
+
 def submit_async_processing_task(payload: dict) -> str:
     """
     Call FastAPI backend to submit a processing job.
     """
     # print("Submitting payload to backend:", payload)
     url = f"{BACKEND_URL}/api/submit"
-    response = requests.post(url, json=payload)
+    response = _post_json(url, payload)
     response.raise_for_status()
 
-    return response.json()["task_id"]
+    return json_loads(response.content)["task_id"]
 
 def submit_mappings_to_backend(task_id: str, mappings: dict):
     print("Submitting mappings to backend:", {"task_id": task_id, "mappings": mappings})
-    response = requests.post(
+    response = _post_json(
         f"{BACKEND_URL}/api/submit-mappings",
-        json={"task_id": task_id, "mappings": mappings}
+        {"task_id": task_id, "mappings": mappings}
     )
     response.raise_for_status()
 
@@ -32,9 +70,9 @@ def check_task_status(task_id: str) -> dict:
     Query backend for current task status.
     """
     url = f"{BACKEND_URL}/api/status/{task_id}"
-    response = requests.get(url)
+    response = _session.get(url, timeout=DEFAULT_TIMEOUT)
     response.raise_for_status()
-    return response.json()
+    return json_loads(response.content)
 
 def download_results(task_id: str) -> str:
     """
@@ -44,5 +82,5 @@ def download_results(task_id: str) -> str:
 
 def check_backend_config():
     """Check backend configuration status."""
-    response = requests.get(f"{BACKEND_URL}/api/config/status")
-    return response.json()
\ No newline at end of file
+    response = _session.get(f"{BACKEND_URL}/api/config/status", timeout=DEFAULT_TIMEOUT)
+    return json_loads(response.content)
\ No newline at end of file
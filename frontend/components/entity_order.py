@@ -3,6 +3,12 @@ from typing import List
 from streamlit_sortables import sort_items
 from frontend.components.log_console import log_to_console
 
+def set_entity_order(order: List[str], session_key: str = "file_order") -> None:
+    """Store an entity order together with the hash of its label set (used for the sortable key)."""
+    st.session_state[session_key] = order
+    st.session_state[f"_{session_key}_hash"] = hash(frozenset(order))
+
+
 def render_entity_order(
     entities: List[dict], 
     session_key: str = "file_order", 
@@ -21,7 +27,7 @@ def render_entity_order(
         updated_order = [label for label in current_file_order if label in current_entities]
         new_entities = [label for label in current_entities if label not in updated_order]
         updated_order.extend(new_entities)
-        st.session_state[session_key] = updated_order
+        set_entity_order(updated_order, session_key)
         current_file_order = updated_order
 
         # Log syncing if needed
@@ -34,15 +40,19 @@ def render_entity_order(
             unsafe_allow_html=True
         )
 
-        # Generate a unique key for the draggable list to avoid caching issues
-        entity_hash = hash(tuple(current_file_order))
+        # Key on the set of labels, not their order, so a drag does not remount the widget;
+        # adding/removing an entity still yields a fresh component
+        entity_hash = st.session_state.get(f"_{session_key}_hash")
+        if entity_hash is None:
+            entity_hash = hash(frozenset(current_file_order))
+            st.session_state[f"_{session_key}_hash"] = entity_hash
         sortable_key = f"entity_order_sortable_{entity_hash}"
 
         sorted_items = sort_items(current_file_order, key=sortable_key)
 
         # If order changed, update session_state and rerun
         if sorted_items != current_file_order:
-            st.session_state[session_key] = sorted_items
+            set_entity_order(sorted_items, session_key)
             if log:
                 log_to_console(f"📋 Entity order updated: {' → '.join(sorted_items)}")
             st.rerun()
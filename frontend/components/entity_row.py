@@ -2,75 +2,108 @@
 
 import streamlit as st
 import os
+import re
+from functools import lru_cache
 import streamlit_nested_layout
-from frontend.constants import ENTITY_TYPES,ENTITY_TYPES_COLORS, ID_TYPES, get_display_ids_for_entity, get_id_info_from_display
+from frontend.constants import (
+    ENTITY_TYPES, ENTITY_TYPES_COLORS, ID_TYPES, ID_TYPE_TO_ENTITIES, ENTITY_TYPE_INDEX, ID_TYPE_INDEX,
+    get_display_ids_for_entity, get_id_info_from_display
+)
+from frontend.components.log_console import log_to_console
+
+# Filename keyword -> entity type; dict order is the priority when several keywords match
+_ENTITY_KEYWORDS = {
+    "promoter": "Promoter", "gene": "Gene", "protein": "Protein", "disease": "Disease",
+    "drug": "Drug", "microbiota": "Microbiota", "pathway": "Pathway", "phenotype": "Phenotype",
+    "exposure": "Exposure", "metabolite": "Metabolite", "transcript": "Transcript"
+}
+# Fallback: lower-cased entity type -> entity type, in ENTITY_TYPES order
+_ENTITY_TYPE_KEYWORDS = {e.lower(): e for e in ENTITY_TYPES if e}
+
+
+def _keyword_scanner(keywords: dict) -> tuple:
+    """Compile `keywords` into one alternation regex plus a keyword -> priority map."""
+    pattern = re.compile("|".join(re.escape(k) for k in keywords))
+    priority = {k: i for i, k in enumerate(keywords)}
+    return pattern, priority
+
+
+_KEYWORD_RE, _KEYWORD_PRIORITY = _keyword_scanner(_ENTITY_KEYWORDS)
+_ENTITY_TYPE_RE, _ENTITY_TYPE_PRIORITY = _keyword_scanner(_ENTITY_TYPE_KEYWORDS)
+
+# Optional: one Aho-Corasick automaton over both tables (reports overlapping hits in one pass)
+try:
+    import ahocorasick
+
+    _KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for _tier, _table in enumerate((_ENTITY_KEYWORDS, _ENTITY_TYPE_KEYWORDS)):
+        for _prio, (_kw, _entity) in enumerate(_table.items()):
+            # Explicit keywords win over the entity-type fallback on the same word
+            if _KEYWORD_AUTOMATON.exists(_kw):
+                continue
+            _KEYWORD_AUTOMATON.add_word(_kw, (_tier, _prio, _entity))
+    _KEYWORD_AUTOMATON.make_automaton()
+except ImportError:
+    _KEYWORD_AUTOMATON = None
+
 
 def match_entity_type(filename: str) -> str | None:
-    name_lower = filename.lower()
-    keyword_map = {
-        "promoter": "Promoter", "gene": "Gene", "protein": "Protein", "disease": "Disease",
-        "drug": "Drug", "microbiota": "Microbiota", "pathway": "Pathway", "phenotype": "Phenotype",
-        "exposure": "Exposure", "metabolite": "Metabolite", "transcript": "Transcript"
-    }
-    for keyword, entity in keyword_map.items():
-        if keyword in name_lower:
-            return entity
-    for entity in ENTITY_TYPES:
-        if entity.lower() in name_lower:
-            return entity
+    return _match_entity_type_cached(filename.lower())
+
+
+# Keyword tables are fixed at import, so the lowered filename is a complete cache key
+@lru_cache(maxsize=512)
+def _match_entity_type_cached(name_lower: str) -> str | None:
+    if _KEYWORD_AUTOMATON is not None:
+        best = min((hit for _, hit in _KEYWORD_AUTOMATON.iter(name_lower)), default=None)
+        return best[2] if best else None
+
+    for pattern, priority, lookup in (
+        (_KEYWORD_RE, _KEYWORD_PRIORITY, _ENTITY_KEYWORDS),
+        (_ENTITY_TYPE_RE, _ENTITY_TYPE_PRIORITY, _ENTITY_TYPE_KEYWORDS),
+    ):
+        hits = pattern.findall(name_lower)
+        if hits:
+            return lookup[min(hits, key=priority.__getitem__)]
     return None
 
-def log_to_console(message: str):
-    logs = st.session_state.get("log_messages", [])
-    logs.append(message)
-    st.session_state["log_messages"] = logs
-
 
 # ---------- BINDING HELPERS ----------
 
+@lru_cache(maxsize=32)
+def _index_map(options: tuple) -> dict[str, int]:
+    # Option lists are static, so each one is indexed once per process
+    return {opt: i for i, opt in enumerate(options)}
+
+
+def _reseed_widget(key: str) -> None:
+    # Drop a widget's state so the next bind re-seeds it from the entity dict
+    # (used after auto-fills that change `ent` behind the widget's back)
+    st.session_state.pop(key, None)
+
+
 def bind_input(label: str, key: str, ent: dict, field: str, help: str | None = None):
-    # Use entity dict value as the source of truth for text input
-    value = ent.get(field, "")
-    new_value = st.text_input(label, value=value, key=key, help=help)
+    # The widget's session_state entry is canonical; the entity dict only seeds it once
+    st.session_state.setdefault(key, ent.get(field, ""))
+    new_value = st.text_input(label, key=key, help=help)
     ent[field] = new_value
     return new_value
 
 
-def bind_selectbox(label: str, options: list[str], key: str, ent: dict, field: str, disabled=False, fallback=None, help: str | None = None):
-    # Get current value from session state first (for immediate UI response), then from entity dict
-    session_value = st.session_state.get(key)
-    entity_value = ent.get(field, fallback or (options[0] if options else ""))
-    
-    # Special handling for different field types
-    if field == "entity_type" and ent.get("auto_fill_type"):
-        # For auto-filled entity types, prefer entity dict value
-        current_value = entity_value
-    elif field == "id_type":
-        # For ID type, always prioritize session state if it exists and is valid
-        if session_value is not None and session_value in options:
-            current_value = session_value
-        else:
-            current_value = entity_value
-    elif session_value is not None and session_value in options:
-        # For other fields, use session state if available and valid
-        current_value = session_value
-    else:
-        # Fallback to entity dict value
-        current_value = entity_value
-    
-    # Ensure the value is in options
-    if current_value not in options:
-        current_value = options[0] if options else ""
-    
-    # Find the index
-    try:
-        index = options.index(current_value)
-    except ValueError:
-        index = 0
-        current_value = options[0] if options else ""
-    
-    # Create the selectbox
-    new_value = st.selectbox(label, options, index=index, key=key, disabled=disabled, help=help)
+def bind_selectbox(label: str, options: list[str], key: str, ent: dict, field: str, disabled=False, fallback=None, help: str | None = None, option_index: dict[str, int] | None = None):
+    # `option_index` maps option -> position; pass a precomputed one to skip list scans
+    if option_index is None:
+        option_index = _index_map(tuple(options))
+
+    # Seed the widget from the entity dict once; afterwards session_state is canonical.
+    # Re-seed only when the stored value is no longer a valid option (e.g. id_type after
+    # an entity_type switch)
+    default = ent.get(field, fallback or (options[0] if options else ""))
+    st.session_state.setdefault(key, default)
+    if st.session_state[key] not in option_index:
+        st.session_state[key] = default if default in option_index else (options[0] if options else None)
+
+    new_value = st.selectbox(label, options, key=key, disabled=disabled, help=help)
 
     # Update the entity dict with the new value
     ent[field] = new_value
@@ -78,8 +111,66 @@ def bind_selectbox(label: str, options: list[str], key: str, ent: dict, field: s
     return new_value
 
 
+# ---------- ROW STYLES ----------
+
+# Spacing/divider rules for every entity row; rows are wrapped in st.container(key="entity_row_<uuid>")
+# and Streamlit (>= 1.39, which added both) tags keyed elements with an `st-key-<key>` class
+ENTITY_ROW_CSS = """
+<style>
+[class*="st-key-entity_row_"] {
+    border-bottom: 1px solid rgba(49, 51, 63, 0.2);
+    padding-bottom: 0.5rem;
+    margin-bottom: 0.3rem;
+}
+[class*="st-key-rm_"] {
+    margin-top: 2.0em;
+}
+</style>
+"""
+
+
+_COLOR_BOX_HTML = (
+    "<div style='margin-top: 0.5em; width: 100%; height: 8.5em; border-radius: 0.4rem; "
+    "background-color: {color}; border: 1px solid #ccc;'></div>"
+)
+
+
+@lru_cache(maxsize=None)
+def _color_box_html(entity_type: str) -> str:
+    # Finite set of entity types, so every box is formatted once per process
+    return _COLOR_BOX_HTML.format(color=ENTITY_TYPES_COLORS.get(entity_type, "transparent"))
+
+
+def inject_entity_row_styles():
+    # Emitted once per rerun instead of spacer/<hr> markdown in every row
+    st.markdown(ENTITY_ROW_CSS, unsafe_allow_html=True)
+
+
 # ---------- MAIN RENDER FUNCTION ----------
 
+@st.fragment
+def render_entity_row_fragment(ent: dict, job_manager):
+    """
+    Render one entity row as a fragment, so edits inside it rerun only this row.
+    Changes that other parts of the page depend on escalate to a full app rerun:
+    removal (flagged in `_remove_<uuid>` for the caller) and entity type changes
+    (knowledge graph, edge types).
+    """
+    type_before = ent.get("entity_type", "")
+    removed = render_entity_row(ent, job_manager)
+    if removed:
+        st.session_state[f"_remove_{ent['uuid']}"] = True
+    # One rerun once the row has finished rendering, however many updates asked for it
+    pending = st.session_state.pop("_pending_rerun", False)
+    if removed or pending or ent.get("entity_type", "") != type_before:
+        st.rerun()
+
+
+def request_rerun():
+    """Ask for a rerun after the current row renders instead of aborting it mid-render."""
+    st.session_state["_pending_rerun"] = True
+
+
 def render_entity_row(ent: dict, job_manager) -> bool:
     uuid = ent["uuid"]
     remove = False
@@ -88,7 +179,6 @@ def render_entity_row(ent: dict, job_manager) -> bool:
 
     # ---------- Delete Button ----------
     with col_del:
-        st.markdown("<div style='height: 2.0em'></div>", unsafe_allow_html=True)
         if st.button("✖", key=f"rm_{uuid}"):
             # Delete associated file before removing entity
             entity_label = ent.get("feature_label", "").strip()
@@ -99,23 +189,10 @@ def render_entity_row(ent: dict, job_manager) -> bool:
 
     # ---------- Color Box ----------
     with col_color:
-        # Get current entity type from session state first (for immediate response), then from entity dict
-        entity_type_key = f"typ_{uuid}"
-        session_entity_type = st.session_state.get(entity_type_key)
-        entity_dict_type = ent.get("entity_type", "")
+        # The Entity Type widget renders below, so read its state directly for immediate response
+        current_entity_type = st.session_state.get(f"typ_{uuid}", ent.get("entity_type", ""))
         
-        # If auto-filled, prefer entity dict value; otherwise use session state for immediate response
-        if ent.get("auto_fill_type"):
-            current_entity_type = entity_dict_type
-        else:
-            current_entity_type = session_entity_type if session_entity_type is not None else entity_dict_type
-        
-        color = ENTITY_TYPES_COLORS.get(current_entity_type, "transparent")
-        st.markdown("<div style='height: 0.5em'></div>", unsafe_allow_html=True) # Add some space
-        st.markdown(
-            f"<div style='width: 100%; height: 8.5em; border-radius: 0.4rem; background-color: {color}; border: 1px solid #ccc;'></div>",
-            unsafe_allow_html=True
-        )
+        st.markdown(_color_box_html(current_entity_type), unsafe_allow_html=True)
 
     # ---------- Form Column ----------
     with col_form:
@@ -123,23 +200,12 @@ def render_entity_row(ent: dict, job_manager) -> bool:
 
         # Node Type
         with upper[0]:
-            # Get current node type from session state first, then from entity dict
             node_type_key = f"ntype_{uuid}"
-            session_node_type = st.session_state.get(node_type_key)
-            
-            if session_node_type is not None:
-                current_node_type = session_node_type
-            else:
-                current_node_type = "Virtual Node" if ent.get("fill0", False) else "Real Node"
-            
-            # Find the index
-            options = ["Real Node", "Virtual Node"]
-            index = 0 if current_node_type == "Real Node" else 1
+            st.session_state.setdefault(node_type_key, "Virtual Node" if ent.get("fill0", False) else "Real Node")
             
             node_type = st.selectbox(
                 label="Node Type",
-                options=options,
-                index=index,
+                options=["Real Node", "Virtual Node"],
                 key=node_type_key,
                 help="Select the type of node for this entity."
             )
@@ -157,6 +223,7 @@ def render_entity_row(ent: dict, job_manager) -> bool:
                 # Auto-fill label when switching to virtual node
                 if not old_is_virtual and ent.get("entity_type", "").strip():
                     ent["feature_label"] = ent["entity_type"].lower()
+                    _reseed_widget(f"lab_{uuid}")
                     log_to_console(f"🏷️ Auto-filled virtual node label: `{ent['entity_type'].lower()}`")
 
         # Label
@@ -175,7 +242,8 @@ def render_entity_row(ent: dict, job_manager) -> bool:
                 key=f"typ_{uuid}",
                 ent=ent,
                 field="entity_type",
-                help="Select the type of entity."
+                help="Select the type of entity.",
+                option_index=ENTITY_TYPE_INDEX
             )
             
             # Auto-fill label for virtual nodes when entity type changes
@@ -184,6 +252,7 @@ def render_entity_row(ent: dict, job_manager) -> bool:
                 new_entity_type != old_entity_type and  # entity type changed
                 new_entity_type.strip()):  # new entity type is not empty
                 ent["feature_label"] = new_entity_type.lower()
+                _reseed_widget(f"lab_{uuid}")
                 log_to_console(f"🏷️ Auto-filled virtual node label: `{new_entity_type.lower()}`")
 
         # ID Type
@@ -191,23 +260,15 @@ def render_entity_row(ent: dict, job_manager) -> bool:
             if ent.get("fill0"):
                 st.selectbox("ID Type", ["N/A"], disabled=True, key=f"idt_{uuid}_disabled")
             else:
-                # Get current entity type from session state or entity dict
-                entity_type_key = f"typ_{uuid}"
-                session_entity_type = st.session_state.get(entity_type_key)
-                entity_dict_type = ent.get("entity_type", "")
-                
-                # If auto-filled, prefer entity dict value; otherwise use session state
-                if ent.get("auto_fill_type"):
-                    current_entity_type = entity_dict_type
-                else:
-                    current_entity_type = session_entity_type if session_entity_type is not None else entity_dict_type
+                # Entity Type was bound just above, so the entity dict is current
+                current_entity_type = ent.get("entity_type", "")
                 
                 # Get display IDs for the current entity type
                 display_opts = get_display_ids_for_entity(current_entity_type)
                 
                 # If entity type changed, reset ID type to first option
                 current_id_type = ent.get("id_type", "")
-                if current_id_type not in display_opts:
+                if current_entity_type not in ID_TYPE_TO_ENTITIES.get(current_id_type, ()):
                     ent["id_type"] = display_opts[0] if display_opts else ""
                 
                 # Use the enhanced bind_selectbox for ID Type with display IDs
@@ -217,7 +278,8 @@ def render_entity_row(ent: dict, job_manager) -> bool:
                     key=f"idt_{uuid}",
                     ent=ent,
                     field="id_type",
-                    help="Select the ID type for this entity."
+                    help="Select the ID type for this entity.",
+                    option_index=ID_TYPE_INDEX.get(current_entity_type)
                 )
 
     # ---------- Upload ----------
@@ -239,12 +301,18 @@ def render_entity_row(ent: dict, job_manager) -> bool:
                 # No file uploaded and no label - use UUID as fallback
                 entity_label = f"entity_{uuid}"
             
+            # Same file under the same label was already saved and processed on an earlier rerun
+            file_sig = (upf.name, upf.size, entity_label) if upf is not None else None
+            if file_sig is not None and ent.get("_file_sig") == file_sig:
+                return False
+
             # Use auto-cleanup method to handle file upload/clear
             previous_file_key = f"_had_file_{uuid}"
             saved_path = job_manager.handle_entity_file_change(upf, entity_label, previous_file_key)
 
             if saved_path:
                 # File was uploaded
+                ent["_file_sig"] = file_sig
                 # Check if this is a new upload (avoid re-processing same file)
                 if ent.get("_uploaded_file_path") == saved_path:
                     return False
@@ -261,6 +329,7 @@ def render_entity_row(ent: dict, job_manager) -> bool:
                     base = os.path.splitext(upf.name)[0]
                     ent["feature_label"] = base
                     ent["auto_fill_label"] = True
+                    _reseed_widget(f"lab_{uuid}")
                     log_to_console(f"✅ Auto-filled label from file: `{base}`")
                     updated = True
                 elif ent.get("auto_fill_label"):
@@ -274,6 +343,7 @@ def render_entity_row(ent: dict, job_manager) -> bool:
                     if matched:
                         ent["entity_type"] = matched
                         ent["auto_fill_type"] = True
+                        _reseed_widget(f"typ_{uuid}")
                         log_to_console(f"✅ Auto-detected entity type: `{matched}`")
                         updated = True
                     else:
@@ -284,51 +354,57 @@ def render_entity_row(ent: dict, job_manager) -> bool:
                     log_to_console("⚠️ Entity type already selected. Skipped auto-detect.")
 
                 if updated:
-                    st.rerun()
+                    request_rerun()
             else:
                 # File was cleared (upf is None) - automatic cleanup was already handled
                 # Just update the entity state
                 if ent.get("_uploaded_once"):
                     ent["file_path"] = ""
                     ent["_uploaded_file_path"] = ""
+                    ent["_file_sig"] = None
                     ent["_uploaded_once"] = False
                     log_to_console(f"🗑️ File cleared for entity: `{entity_label}`")
-                    st.rerun()
+                    request_rerun()
 
-    st.markdown("<hr style='margin-top: 0.5rem; margin-bottom: 0.8rem;'>", unsafe_allow_html=True)
     return False
 
 
 # ---------- VALIDATION FUNCTIONS ----------
 
-def validate_entities(entities: list) -> dict:
+def validate_entities(entities: list, *, fast: bool = False) -> dict:
     """
     validate all entities for completeness
     Returns a dictionary with validation results
+    With fast=True, stops at the first error (quick "ready to submit?" check)
     """
     errors = []
     warnings = []
     
     for i, ent in enumerate(entities):
-        entity_name = ent.get("feature_label", f"Entity {i+1}")
-        is_virtual = ent.get("fill0", False)
+        get = ent.get
+        entity_name = get("feature_label", f"Entity {i+1}")
+        has_label = bool((get("feature_label") or "").strip())
+        has_type = bool((get("entity_type") or "").strip())
         
-        if is_virtual:
+        if get("fill0", False):
             # Virtual node only needs label and entity type
-            if not ent.get("feature_label", "").strip():
+            if not has_label:
                 errors.append(f"Virtual node {i+1}: Missing label")
-            if not ent.get("entity_type", "").strip():
+            if not has_type:
                 errors.append(f"Virtual node '{entity_name}': Missing entity type")
         else:
             # Real node needs to check all fields
-            if not ent.get("feature_label", "").strip():
+            if not has_label:
                 errors.append(f"Real node {i+1}: Missing label")
-            if not ent.get("entity_type", "").strip():
+            if not has_type:
                 errors.append(f"Real node '{entity_name}': Missing entity type")
-            if not ent.get("id_type", "").strip():
+            if not (get("id_type") or "").strip():
                 errors.append(f"Real node '{entity_name}': Missing ID type")
-            if not ent.get("file_path", "").strip():
+            if not (get("file_path") or "").strip():
                 errors.append(f"Real node '{entity_name}': Missing uploaded file")
+
+        if fast and errors:
+            break
     
     return {
         "valid": len(errors) == 0,
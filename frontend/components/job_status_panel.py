@@ -1,57 +1,100 @@
 import streamlit as st
+import random
 import time
 from pathlib import Path
 from frontend.api.client import check_backend_config
 
 
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_backend_config():
+    # Shared by every session/tab for 30s; a raised error is not cached, so failures retry
+    return check_backend_config(), time.time()
+
+
+def _backend_status_with_time():
+    """
+    Return (status dict, time of the check)
+    """
+    try:
+        return _cached_backend_config()
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": str(e),
+            "database_path": "Unknown",
+        }, time.time()
+
+
 def check_backend_with_cache():
     """
     Check backend status and return (status, message, database_path)
     """
-    if "backend_initial_check" not in st.session_state:
-        try:
-            config_status = check_backend_config()
-            st.session_state["backend_status"] = config_status
-            st.session_state["backend_initial_check"] = True
-            st.session_state["last_backend_check"] = time.time()
-        except Exception as e:
-            st.session_state["backend_status"] = {
-                "status": "error",
-                "message": str(e),
-                "database_path": "Unknown",
-            }
-            st.session_state["backend_initial_check"] = True
-            st.session_state["last_backend_check"] = time.time()
-
-    status = st.session_state.get("backend_status", {})
+    status, _ = _backend_status_with_time()
     return status
 
 
-def safe_api_call(api_func, *args, **kwargs):
+# Backend recheck after a connection error: up to 3 probes at ~0.5s, 1s, 2s (capped, +/-20% jitter)
+_RECHECK_ATTEMPTS = 3
+_RECHECK_BASE_DELAY = 0.5
+_RECHECK_MAX_DELAY = 8.0
+# Consecutive failed recoveries per session before giving up without probing again
+_MAX_SESSION_RECOVERIES = 3
+
+
+def _recheck_backend_with_backoff():
+    """
+    Probe the backend config with exponential backoff + jitter.
+    Returns (status dict or None, last error) - status is None if the backend never answered.
+    """
+    last_error = None
+    for attempt in range(_RECHECK_ATTEMPTS):
+        delay = min(_RECHECK_MAX_DELAY, _RECHECK_BASE_DELAY * 2 ** attempt)
+        time.sleep(delay * random.uniform(0.8, 1.2))
+        # Drop the cached (possibly stale "ok") status before rechecking
+        _cached_backend_config.clear()
+        try:
+            config_status, _ = _cached_backend_config()
+            return config_status, None
+        except Exception as recheck_error:
+            last_error = recheck_error
+    return None, last_error
+
+
+def safe_api_call(api_func, *args, retriable=False, **kwargs):
     """
     Safe API call wrapper with automatic error recovery.
-    Re-checks backend status when connection errors occur.
+    Re-checks backend status (with backoff) when connection errors occur; idempotent calls
+    marked `retriable=True` are re-issued once the backend answers again.
     """
     try:
-        return api_func(*args, **kwargs)
+        result = api_func(*args, **kwargs)
+        st.session_state["_backend_retry_count"] = 0
+        return result
     except Exception as e:
         # Check if it's a connection error
         if "connection" in str(e).lower() or "refused" in str(e).lower():
+            retry_count = st.session_state.get("_backend_retry_count", 0) + 1
+            st.session_state["_backend_retry_count"] = retry_count
+            if retry_count > _MAX_SESSION_RECOVERIES:
+                st.error(f"❌ Cannot reach backend: {e}")
+                st.stop()
+
             # 3. Error-time re-check - verify backend status when errors occur
             st.warning("⚠️ Connection lost, rechecking backend status...")
-            try:
-                config_status = check_backend_config()
-                st.session_state["backend_status"] = config_status
-                st.session_state["last_backend_check"] = time.time()
-
-                if config_status["status"] == "ok":
-                    st.info("✅ Backend is available, please retry your request")
-                else:
-                    st.error("❌ Backend is unavailable")
-                    st.stop()
-            except Exception as recheck_error:
+            config_status, recheck_error = _recheck_backend_with_backoff()
+
+            if config_status is None:
                 st.error(f"❌ Cannot reach backend: {recheck_error}")
                 st.stop()
+            if config_status.get("status") != "ok":
+                st.error("❌ Backend is unavailable")
+                st.stop()
+
+            if retriable:
+                result = api_func(*args, **kwargs)
+                st.session_state["_backend_retry_count"] = 0
+                return result
+            st.info("✅ Backend is available, please retry your request")
         # Re-raise the original error for the caller to handle
         raise e
 
@@ -60,7 +103,7 @@ def render_job_status_panel(job_manager):
     job_info = job_manager.get_job_info()
 
     # Get backend status
-    backend_status = check_backend_with_cache()
+    backend_status, last_check = _backend_status_with_time()
     backend_ok = backend_status.get("status") == "ok"
 
     # Expand based on backend error status
@@ -88,7 +131,6 @@ def render_job_status_panel(job_manager):
 
         # Backend status
         if backend_ok:
-            last_check = st.session_state.get("last_backend_check", 0)
             check_time = time.strftime("%H:%M:%S", time.localtime(last_check))
 
             col1, col2 = st.columns([3, 1])
@@ -98,7 +140,7 @@ def render_job_status_panel(job_manager):
                 )
             with col2:
                 if st.button("🔄 Re-Check Backend Status", key="refresh_backend"):
-                    del st.session_state["backend_initial_check"]
+                    _cached_backend_config.clear()
                     st.rerun()
         else:
             st.error(f"❌ Backend error: {backend_status.get('message', 'Unknown error')}")
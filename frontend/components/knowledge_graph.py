@@ -5,39 +5,87 @@ import networkx as nx
 from pyvis.network import Network
 import streamlit.components.v1 as components
 from frontend.constants import ENTITY_TYPES_COLORS, NODE_POSITIONS, EDGES
+from frontend.components.log_console import log_to_console
 import os
+import uuid
+from functools import lru_cache
 
 selected_color = "black"  # Color for selected nodes and edges
 error_color = "#ff0000"  # Color for errors (missing nodes, broken paths)
 
+# Static graph structures for connectivity analysis, built once at import
+_EDGE_SET = frozenset(EDGES)
+_UG = nx.freeze(nx.DiGraph(EDGES).to_undirected())
+# Hop distance between every reachable pair (one BFS per node); missing key means no path
+_HOP_DIST = {src: dict(dists) for src, dists in nx.all_pairs_shortest_path_length(_UG)}
+_CORE_ORDER = ["Promoter", "Gene", "Transcript", "Protein"]
+_CORE_SET = frozenset(_CORE_ORDER)
+_CORE_INDEX = {n: i for i, n in enumerate(_CORE_ORDER)}
+
+# Static part of each drawn node (same order as the nodes of a DiGraph built from EDGES);
+# only border/background overlays depend on the selection
+_NODE_SPECS = tuple(
+    (n, ENTITY_TYPES_COLORS.get(n, "gray"), NODE_POSITIONS[n][0], NODE_POSITIONS[n][1])
+    for n in dict.fromkeys(n for edge in EDGES for n in edge)
+)
+
 def render_knowledge_graph(job_manager):
     st.subheader("🧠 Knowledge Graph")
     
     # Retrieve selected entity types (from session_state.entities)
-    selected_entities = []
-    if "entities" in st.session_state:
-        selected_entities = [
-            ent["entity_type"] for ent in st.session_state.entities if ent["entity_type"]
-        ]
+    entities = st.session_state.get("entities", [])
+    selected_entities = [ent["entity_type"] for ent in entities if ent["entity_type"]]
     
     # Analyze connectivity of the knowledge graph
-    connectivity_analysis = analyze_knowledge_graph_connectivity(st.session_state.get("entities", []))
-    
+    connectivity_analysis = analyze_knowledge_graph_connectivity(entities)
     missing_nodes = connectivity_analysis.get("missing_nodes", [])
-    edges_on_paths = connectivity_analysis.get("edges_on_paths", [])
 
-    # Create a directed graph
-    G = nx.DiGraph()
-    G.add_edges_from(EDGES)
+    # The graph only depends on the selected type set, so reruns reuse the cached HTML
+    html_content = _build_graph_html(_selected_type_signature(entities))
+    components.html(html_content, height=500, scrolling=False)
+    
+    # Display legend and status information
+    if selected_entities and not missing_nodes:
+        st.markdown("✅ **All selected entities are connected**")
+    elif missing_nodes:
+        st.markdown("**🔍 Graph Analysis:**")
+        st.markdown(f"🔴 **Missing nodes for connectivity:** {', '.join(missing_nodes)}")
+        
+        # Quick add missing nodes button
+        if st.button("🔧 Quick add missing nodes", key="quick_add_missing"):
+            for missing_node in missing_nodes:
+                st.session_state.entities.append(dict(
+                    uuid=str(uuid.uuid4()),
+                    fill0=True,  # Virtual node
+                    feature_label=missing_node.lower(),  # Use lowercase label
+                    entity_type=missing_node,
+                    id_type="",
+                    file_path=""
+                ))
+            log_to_console(f"🔧 Quick-added missing virtual nodes: {', '.join(missing_nodes)}")
+            st.rerun()
+
+@st.cache_data(show_spinner=False)
+def _build_graph_html(selected_type_sig: tuple) -> str:
+    """Build the pyvis knowledge-graph HTML for a sorted tuple of selected entity types."""
+    selected_set = frozenset(selected_type_sig)
+    # Same (lru-cached) analysis render_knowledge_graph uses, at the default hop bound
+    connectivity_analysis = _analyze_connectivity(selected_type_sig, 5)
+
+    missing_nodes = connectivity_analysis.get("missing_nodes", [])
+    # Set views for the per-node/per-edge membership checks below
+    missing_node_set = set(missing_nodes)
+    edges_on_paths = set(connectivity_analysis.get("edges_on_paths", []))
 
     # Create a Pyvis network
-    net = Network(height="500px", width="100%", directed=True)
+    # Remote resources: vis.js comes from the CDN (browser-cached), not inlined into every rerun's HTML
+    net = Network(height="500px", width="100%", directed=True, cdn_resources="remote")
     net.barnes_hut()  # Use a smoother force-directed engine (physics layout is disabled)
 
     # Add nodes with fixed positions
-    for node in G.nodes():
-        is_selected = node in selected_entities
-        is_missing = node in missing_nodes
+    for node, base_color, x, y in _NODE_SPECS:
+        is_selected = node in selected_set
+        is_missing = node in missing_node_set
         
         # Determine node color and border based on state
         if is_missing:
@@ -45,11 +93,11 @@ def render_knowledge_graph(job_manager):
             border_color = error_color  # red border
             border_width = 2
         elif is_selected:
-            node_color = ENTITY_TYPES_COLORS.get(node, "gray")
+            node_color = base_color
             border_color = selected_color
             border_width = 3
         else:
-            node_color = ENTITY_TYPES_COLORS.get(node, "gray")
+            node_color = base_color
             border_color = "#333"
             border_width = 1
 
@@ -66,21 +114,21 @@ def render_knowledge_graph(job_manager):
             },
             borderWidth=border_width,
             borderWidthSelected=border_width,
-            x=NODE_POSITIONS[node][0],
-            y=NODE_POSITIONS[node][1],
+            x=x,
+            y=y,
             fixed={"x": True, "y": True}
         )
 
     # Add edges with highlighting
-    for src, dst in G.edges():
+    for src, dst in EDGES:
         # This edge is part of at least one chosen path (either direction)
         is_path_edge = (src, dst) in edges_on_paths or (dst, src) in edges_on_paths
 
         # The edge directly connects two user-selected nodes
-        connects_selected = src in selected_entities and dst in selected_entities
+        connects_selected = src in selected_set and dst in selected_set
 
         # At least one endpoint of this edge is currently missing (virtual-needed)
-        edge_involves_missing = (src in missing_nodes) or (dst in missing_nodes)
+        edge_involves_missing = (src in missing_node_set) or (dst in missing_node_set)
 
         if is_path_edge and edge_involves_missing:
              # On a chosen path AND touches a missing node → highlight as an unresolved requirement
@@ -138,24 +186,8 @@ def render_knowledge_graph(job_manager):
     }
     """)
 
-    net.save_graph("temp_graph.html")
-    
-    # Move the graph to the session's temp directory
-    if "job_id" in st.session_state:
-        job_dir = job_manager.get_job_dir()
-        temp_graph_path = job_dir / "temp_graph.html"
-        
-        # Move the file to temp directory
-        import shutil
-        shutil.move("temp_graph.html", str(temp_graph_path))
-        
-        # Read from temp directory
-        with open(temp_graph_path, "r", encoding="utf-8") as f:
-            html_content = f.read()
-    else:
-        # Fallback: read from current directory if no session
-        with open("temp_graph.html", "r", encoding="utf-8") as f:
-            html_content = f.read()
+    # Render in memory: no temp_graph.html shared (and clobbered) across sessions
+    html_content = net.generate_html(notebook=False)
 
     # Inject the drawing code before the </script> that closes Vis.js config
     injected_code = """
@@ -195,50 +227,43 @@ def render_knowledge_graph(job_manager):
         "#mynetwork{border:none!important; outline:none!important;}"
         ".vis-network, .vis-network * {border:none!important; outline:none!important; box-shadow:none!important;}"
         "html,body{margin:0;padding:0;}"
-        "</style>"
+        "</style>",
+        1
     )
 
-    # Insert before last </script>
-    html_content = html_content.replace("</script>", injected_code + "\n</script>")
+    # Insert before last </script> only (replace() would also patch every library <script> tag)
+    head, sep, tail = html_content.rpartition("</script>")
+    if sep:
+        html_content = head + injected_code + "\n" + sep + tail
 
-    components.html(html_content, height=500, scrolling=False)
-    
-    # Display legend and status information
-    if selected_entities and not missing_nodes:
-        st.markdown("✅ **All selected entities are connected**")
-    elif missing_nodes:
-        st.markdown("**🔍 Graph Analysis:**")
-        st.markdown(f"🔴 **Missing nodes for connectivity:** {', '.join(missing_nodes)}")
-        
-        # Quick add missing nodes button
-        if st.button("🔧 Quick add missing nodes", key="quick_add_missing"):
-            import uuid
-            for missing_node in missing_nodes:
-                st.session_state.entities.append(dict(
-                    uuid=str(uuid.uuid4()),
-                    fill0=True,  # Virtual node
-                    feature_label=missing_node.lower(),  # Use lowercase label
-                    entity_type=missing_node,
-                    id_type="",
-                    file_path=""
-                ))
-            from .entity_row import log_to_console
-            log_to_console(f"🔧 Quick-added missing virtual nodes: {', '.join(missing_nodes)}")
-            st.rerun()
+    return html_content
 
-def analyze_knowledge_graph_connectivity(
-    entities: list,
-    max_hops_per_path: int = 5
-) -> dict:
-    #  User-selected entity types
+def _selected_type_signature(entities: list) -> tuple:
+    """Sorted tuple of the non-empty entity types in `entities` (hashable cache key)."""
     selected_types = set()
     for ent in entities:
         t = (ent.get("entity_type") or "").strip()
         if t:
             selected_types.add(t)
+    return tuple(sorted(selected_types))
 
-    core_order = ["Promoter", "Gene", "Transcript", "Protein"]
-    core_set = set(core_order)
+def analyze_knowledge_graph_connectivity(
+    entities: list,
+    max_hops_per_path: int = 5
+) -> dict:
+    # Only the set of entity types matters, so reruns with the same types hit the cache.
+    # The cached result is shared, so hand callers their own top-level lists.
+    result = _analyze_connectivity(_selected_type_signature(entities), max_hops_per_path)
+    return {k: list(v) if isinstance(v, list) else v for k, v in result.items()}
+
+# Plain lru_cache: st.cache_data would pickle/unpickle the result on every hit
+@lru_cache(maxsize=128)
+def _analyze_connectivity(selected_type_sig: tuple, max_hops_per_path: int) -> dict:
+    #  User-selected entity types
+    selected_types = set(selected_type_sig)
+
+    core_order = _CORE_ORDER
+    core_set = _CORE_SET
 
     if not selected_types:
         return {
@@ -249,10 +274,7 @@ def analyze_knowledge_graph_connectivity(
             "path_options": []
         }
 
-    # Construct undirected graph
-    G = nx.DiGraph()
-    G.add_edges_from(EDGES)
-    UG = G.to_undirected()
+    UG = _UG
 
     missing_nodes: list[str] = []
     suggestions: list[str] = []
@@ -262,39 +284,34 @@ def analyze_knowledge_graph_connectivity(
     def add_edges_on_paths(path_seq: list[str]):
         for k in range(len(path_seq) - 1):
             u, v = path_seq[k], path_seq[k + 1]
-            if (u, v) in EDGES:
+            if (u, v) in _EDGE_SET:
                 edges_on_paths.add((u, v))
-            elif (v, u) in EDGES:
+            elif (v, u) in _EDGE_SET:
                 edges_on_paths.add((v, u))
 
     def all_shortest_paths_bound(src: str, dst: str) -> list[list[str]]:
         """Return all shortest paths within hop bound; empty list if none."""
-        try:
-            p = nx.shortest_path(UG, src, dst)
-            L = len(p) - 1
-            if L > max_hops_per_path:
-                return []
-            return [path for path in nx.all_shortest_paths(UG, src, dst) if len(path) - 1 == L]
-        except (nx.NodeNotFound, nx.NetworkXNoPath):
+        L = _HOP_DIST.get(src, {}).get(dst)
+        if L is None or L > max_hops_per_path:
             return []
+        return list(nx.all_shortest_paths(UG, src, dst))
         
     def has_direct_edge(u: str, v: str) -> bool:
         """Check if there is a direct (undirected) edge between u and v in EDGES."""
-        return (u, v) in EDGES or (v, u) in EDGES
+        return (u, v) in _EDGE_SET or (v, u) in _EDGE_SET
 
     def core_segment_from(cn: str) -> list[str]:
         """Return the core segment from core node `cn` to Protein, inclusive."""
-        i = core_order.index(cn)
-        j = core_order.index("Protein")
+        i = _CORE_INDEX[cn]
+        j = _CORE_INDEX["Protein"]
         return core_order[i:j+1] if i <= j else [cn]
 
     # core bone auto-fill
     selected_core = list(selected_types.intersection(core_set))
     core_autofill_set: set[str] = set()
     if selected_core:
-        idxs = [core_order.index(n) for n in selected_core]
-        start_idx = min(idxs)
-        protein_idx = core_order.index("Protein")
+        start_idx = min(_CORE_INDEX[n] for n in selected_core)
+        protein_idx = _CORE_INDEX["Protein"]
         core_path = core_order[start_idx:protein_idx + 1] if start_idx <= protein_idx else [core_order[start_idx]]
 
         core_autofill_set = set(core_path)
@@ -307,8 +324,8 @@ def analyze_knowledge_graph_connectivity(
         # Highlight core edges
         for k in range(len(core_path) - 1):
             u, v = core_path[k], core_path[k + 1]
-            if (u, v) in EDGES or (v, u) in EDGES:
-                edges_on_paths.add((u, v) if (u, v) in EDGES else (v, u))
+            if (u, v) in _EDGE_SET or (v, u) in _EDGE_SET:
+                edges_on_paths.add((u, v) if (u, v) in _EDGE_SET else (v, u))
 
     # Process non-core node pairs
     def process_pair(src: str, dst: str):
@@ -389,9 +406,9 @@ def analyze_knowledge_graph_connectivity(
     else:
         # No core: pairwise processing
         endpoints = list(selected_types)
-        for i in range(len(endpoints)):
-            for j in range(i + 1, len(endpoints)):
-                process_pair(endpoints[i], endpoints[j])
+        for i, src in enumerate(endpoints):
+            for dst in endpoints[i + 1:]:
+                process_pair(src, dst)
 
     # Final connectivity status
     connected = len(missing_nodes) == 0
@@ -407,19 +424,18 @@ def generate_edge_types_from_entities(entities: list) -> list:
     """
     Generate edge types based on selected entities and the predefined edges.
     """
-    
+    return list(_edge_types_for(_selected_type_signature(entities)))
+
+@lru_cache(maxsize=128)
+def _edge_types_for(selected_type_sig: tuple) -> tuple:
     # Get only user-selected entity types (not including connectivity analysis)
-    selected_types = set()
-    for ent in entities:
-        if ent.get("entity_type", "").strip():
-            selected_types.add(ent.get("entity_type"))
+    selected_types = set(selected_type_sig)
     
     # Generate edge types only for actually selected entities
-    edge_types = []
-    for source, target in EDGES:
-        if source in selected_types and target in selected_types:
-            edge_type = f"{source}-{target}"
-            if edge_type not in edge_types:
-                edge_types.append(edge_type)
+    edge_types = {
+        f"{source}-{target}"
+        for source, target in EDGES
+        if source in selected_types and target in selected_types
+    }
     
-    return sorted(edge_types)
\ No newline at end of file
+    return tuple(sorted(edge_types))
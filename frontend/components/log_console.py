@@ -1,30 +1,28 @@
 # components/log_console.py
 
 
+from collections import deque
 import streamlit as st
 
+MAX_LOG_MESSAGES = 500
+MAX_VISIBLE_LOGS = 200
+
 def log_to_console(message: str):
-    logs = st.session_state.get("log_messages", [])
+    # Bounded deque owned by session_state (seeded in build_app): O(1) append, oldest lines drop off
+    logs = st.session_state.get("log_messages")
+    if logs is None:
+        logs = st.session_state["log_messages"] = deque(maxlen=MAX_LOG_MESSAGES)
     logs.append(message)
-    st.session_state["log_messages"] = logs
 
 
 def render_log_console():
     st.markdown("### 📟 Session Log")
 
-    logs = st.session_state.get("log_messages", [])
+    logs = st.session_state.get("log_messages", ())
+    # Only the newest lines are shown, rendered as one markdown element instead of a chat_message each
+    visible = list(logs)[-MAX_VISIBLE_LOGS:]
 
     # Fixed height container for logs
     with st.container(height=400):
-        st.markdown("""
-        <style>
-        .stChatMessage {
-            padding-top: 0.2rem;
-            padding-bottom: 0.2rem;
-        }
-        </style>
-        """, unsafe_allow_html=True)
-
-        for log in logs:
-            with st.chat_message("log", avatar="🖥️"):
-                st.markdown(log)
\ No newline at end of file
+        if visible:
+            st.markdown("\n\n".join(f"🖥️ {log}" for log in visible))
@@ -70,6 +70,7 @@ def render_mapping_selector(candidate_data: List[Dict[str, Any]]) -> Optional[Li
                     # options is expected to be a list[dict]
                     option_labels = []
                     option_lookup = {}  # display_text -> candidate_dict
+                    option_positions = {}  # display_text -> selectbox index
 
                     if isinstance(options, list):
                         for cand in options:
@@ -80,11 +81,13 @@ def render_mapping_selector(candidate_data: List[Dict[str, Any]]) -> Optional[Li
                             if display_text not in option_lookup:
                                 option_lookup[display_text] = cand
                                 option_labels.append(display_text)
+                                option_positions[display_text] = len(option_labels)
 
                     select_options = ["-- No Match --"] + option_labels
 
+                    # Index 0 is "-- No Match --", which is also the fallback
                     default_value = st.session_state.get(select_key, "-- No Match --")
-                    index = select_options.index(default_value) if default_value in select_options else 0
+                    index = option_positions.get(default_value, 0)
 
                     selected = st.selectbox(
                         f"Select match for '{original_id}'",
@@ -1,4 +1,5 @@
-from typing import Dict, List
+from types import MappingProxyType
+from typing import Dict, FrozenSet, List, Mapping, Tuple
 
 # --------------------------- CONSTANTS -----------------------------------
 ENTITY_TYPES = [
@@ -204,18 +205,49 @@ EDGES = [
 
 ]
 
+# --------------------------- LOOKUP INDEXES -----------------------------------
+
+# display_id -> entity types offering it, e.g. "HGNC Symbol" -> {"Gene", "Protein", ...}
+_id_type_to_entities: Dict[str, set] = {}
+# (entity_type, display_id) -> {"actual_id": ..., "match_mode": ...}
+_DISPLAY_ID_INFO: Dict[Tuple[str, str], Dict[str, str]] = {}
+for _entity_type, _items in ID_TYPES.items():
+    for _item in _items:
+        _id_type_to_entities.setdefault(_item["display_id"], set()).add(_entity_type)
+        _DISPLAY_ID_INFO[(_entity_type, _item["display_id"])] = {
+            "actual_id": _item["actual_id"],
+            "match_mode": _item["match_mode"],
+        }
+
+# Selectable entity types without the "" placeholder
+NONEMPTY_ENTITY_TYPES = tuple(t for t in ENTITY_TYPES if t.strip())
+
+# Position lookups replacing list.index() on the constant option lists
+ENTITY_TYPE_INDEX: Dict[str, int] = {t: i for i, t in enumerate(ENTITY_TYPES)}
+ID_TYPE_INDEX: Dict[str, Dict[str, int]] = {
+    entity_type: {item["display_id"]: i for i, item in enumerate(items)}
+    for entity_type, items in ID_TYPES.items()
+}
+DISPLAY_IDS: Dict[str, List[str]] = {
+    entity_type: [item["display_id"] for item in items]
+    for entity_type, items in ID_TYPES.items()
+}
+DEFAULT_ORDER_PRIORITY: Dict[str, int] = {t: i for i, t in enumerate(DEFAULT_ENTITY_ORDER)}
+
+ID_TYPE_TO_ENTITIES: Mapping[str, FrozenSet[str]] = MappingProxyType(
+    {display_id: frozenset(entities) for display_id, entities in _id_type_to_entities.items()}
+)
+del _id_type_to_entities, _entity_type, _items, _item
+
 # --------------------------- HELPER FUNCTIONS -----------------------------------
 
 def get_display_ids_for_entity(entity_type: str) -> List[str]:
-    if entity_type not in ID_TYPES:
-        return []
-    return [item["display_id"] for item in ID_TYPES[entity_type]]
+    # Shared precomputed list; callers must not mutate it
+    return DISPLAY_IDS.get(entity_type, [])
 
 def get_id_info_from_display(entity_type: str, display_id: str) -> Dict[str, str]:
-    if entity_type not in ID_TYPES:
+    info = _DISPLAY_ID_INFO.get((entity_type, display_id))
+    if info is None:
         return {"actual_id": "", "match_mode": "hard"}
-    for item in ID_TYPES[entity_type]:
-        if item["display_id"] == display_id:
-            return {"actual_id": item["actual_id"], "match_mode": item["match_mode"]}
-    return {"actual_id": "", "match_mode": "hard"}
+    return dict(info)
 
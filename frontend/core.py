@@ -4,10 +4,11 @@ biomedgraphica_core.py
 """
 
 import json, uuid, os, time
+from collections import deque
 from typing import Dict, List
 
 from frontend.constants import (
-    ENTITY_TYPES, ID_TYPES, DEFAULT_ENTITY_ORDER,
+    ENTITY_TYPES, ID_TYPES, DEFAULT_ENTITY_ORDER, DEFAULT_ORDER_PRIORITY, NONEMPTY_ENTITY_TYPES,
     get_display_ids_for_entity, get_id_info_from_display
 )
 
@@ -15,12 +16,13 @@ from frontend.init_job_manager import initialize_job_manager
 
 from frontend.components.job_status_panel import render_job_status_panel, safe_api_call
 
-from frontend.components.entity_row import render_entity_row, validate_entities, check_label_file
+from frontend.components.entity_row import render_entity_row_fragment, inject_entity_row_styles, validate_entities, check_label_file
+from frontend.components.log_console import MAX_LOG_MESSAGES
 # from frontend.components.log_console import render_log_console, log_to_console
 from frontend.components.usage_notes import render_usage_notes
 from frontend.components.knowledge_graph import render_knowledge_graph, analyze_knowledge_graph_connectivity, generate_edge_types_from_entities
 
-from frontend.components.entity_order import render_entity_order
+from frontend.components.entity_order import render_entity_order, set_entity_order
 
 from frontend.components.mapping_selector import render_mapping_selector
 from frontend.components.processing_summary import render_processing_summary
@@ -39,29 +41,61 @@ def _generate_default_entity_order(entities):
     Generate default entity order based on entity types and labels.
     Uses DEFAULT_ENTITY_ORDER for priority, with labels as display names.
     """
-    
-    # Create a mapping from entity type to its priority order
-    entity_type_priority = {}
-    for i, entity_type in enumerate(DEFAULT_ENTITY_ORDER):
-        entity_type_priority[entity_type] = i
-    
-    # Create list of tuples (priority, label) for sorting
-    entity_list = []
-    for e in entities:
-        label = e["feature_label"].strip()
-        if label:
-            entity_type = e.get("entity_type", "")
-            # Use priority from DEFAULT_ENTITY_ORDER, or assign high number for unknown types
-            priority = entity_type_priority.get(entity_type, 999)
-            entity_list.append((priority, label))
-    
-    # Sort by priority and return labels
-    entity_list.sort(key=lambda x: x[0])
-    return [label for _, label in entity_list]
+    # Stable sort by DEFAULT_ENTITY_ORDER priority; unknown types go last
+    prio = DEFAULT_ORDER_PRIORITY
+    return [e["feature_label"].strip() for e in sorted(
+        (e for e in entities if e["feature_label"].strip()),
+        key=lambda e: prio.get(e.get("entity_type", ""), 999))]
 
 def _build_file_order(entities):
     return _generate_default_entity_order(entities)
 
+def _validation_signature(entities, label_path):
+    """Hashable snapshot of every input that Step 1 validation looks at."""
+    return hash((
+        tuple(
+            (e.get("feature_label", ""), e.get("entity_type", ""), e.get("id_type", ""), e.get("fill0", False), e.get("file_path", ""))
+            for e in entities
+        ),
+        label_path,
+    ))
+
+def _entity_to_cfg(e):
+    """
+    Build the backend config for one entity row, or None if it has no label.
+    File paths are made absolute here so the payload needs no second pass.
+    """
+    if not e["feature_label"].strip():
+        return None
+    id_info = get_id_info_from_display(e["entity_type"], e["id_type"])
+    return dict(
+        feature_label=e["feature_label"],
+        entity_type=e["entity_type"].lower(),
+        id_type=id_info["actual_id"],
+        match_mode=id_info["match_mode"],
+        file_path=os.path.abspath(e["file_path"]) if e["file_path"] else "",
+        fill0=e["fill0"]
+    )
+
+def _payload_signature(payload):
+    """
+    Hashable snapshot of a submit payload, used to skip resubmitting an identical job.
+    Input files are keyed by size/mtime too: a re-upload under the same name reuses the path.
+    """
+    cfgs = list(payload.get("entities_cfgs") or []) + [payload.get("label_cfg") or {}]
+    file_stats = []
+    for cfg in cfgs:
+        path = cfg.get("file_path")
+        if path and os.path.exists(path):
+            stat = os.stat(path)
+            file_stats.append((path, stat.st_size, stat.st_mtime_ns))
+    return hash((json.dumps(payload, sort_keys=True, default=str), tuple(file_stats)))
+
+def _reset_edge_multiselects(ss):
+    """Drop the state of every edge-type multiselect, tracked in `_edge_multiselect_keys`."""
+    for key in ss.pop("_edge_multiselect_keys", ()):
+        ss.pop(key, None)
+
 # --------------------------- MAIN BUILDER --------------------------------
 
 def build_app():
@@ -89,7 +123,12 @@ def build_app():
     st.session_state.setdefault("step1_open", True)
     st.session_state.setdefault("step2_open", False)
 
-    st.session_state.setdefault("log_messages", ["📟 Processing console initialized."])
+    if "log_messages" not in st.session_state:
+        st.session_state.log_messages = deque(["📟 Processing console initialized."], maxlen=MAX_LOG_MESSAGES)
+
+    # Bind session state once; reads below go through locals
+    ss = st.session_state
+    entities = ss.entities
 
     # ---------- Job Status Panel ----------
     render_job_status_panel(job_manager)
@@ -102,25 +141,31 @@ def build_app():
     with main_left:
 
         # -------- Step 1 --------
-        with st.expander("Step 1 – Entities & Labels", expanded=st.session_state.step1_open):
+        with st.expander("Step 1 – Entities & Labels", expanded=ss.step1_open):
             st.subheader("Entities")
 
             # Entity rows (import from components/entity_row.py)
+            # Not wrapped in st.form: rows hold a delete st.button (not allowed in forms) and the
+            # ID-type options, color swatch and graph must react to the entity type immediately.
+            # Each row is a fragment; deletions come back as `_remove_<uuid>` flags.
+            inject_entity_row_styles()
             remove_indices = []
-            for i, ent in enumerate(st.session_state.entities):
-                if render_entity_row(ent, job_manager):
+            for i, ent in enumerate(entities):
+                with st.container(key=f"entity_row_{ent['uuid']}"):
+                    render_entity_row_fragment(ent, job_manager)
+                if ss.pop(f"_remove_{ent['uuid']}", False):
                     remove_indices.append(i)
 
             # Remove selected rows
             for i in sorted(remove_indices, reverse=True):
-                del st.session_state.entities[i]
+                del entities[i]
             if remove_indices:
                 # Update file order to reflect entity removal
-                current_entities = [ent["feature_label"] for ent in st.session_state.entities]
-                current_file_order = st.session_state.get("file_order", [])
+                current_entities = [ent["feature_label"] for ent in entities]
+                current_file_order = ss.get("file_order", [])
                 # Keep only entities that still exist
                 updated_file_order = [label for label in current_file_order if label in current_entities]
-                st.session_state.file_order = updated_file_order
+                set_entity_order(updated_file_order)
                 # log_to_console(f"📋 Entity order updated after removal: {' → '.join(updated_file_order)}")
                 st.rerun()
 
@@ -129,7 +174,7 @@ def build_app():
             
             with btn_col1:
                 if st.button("➕ Add Entity", use_container_width=True):
-                    st.session_state.entities.append(dict(
+                    entities.append(dict(
                         uuid=str(uuid.uuid4()),
                         fill0=False,
                         feature_label="",
@@ -143,12 +188,12 @@ def build_app():
             with btn_col2:
                 if st.button("🔧 Add Missing Entities", use_container_width=True):
                     # Analyze connectivity and add missing nodes
-                    connectivity_analysis = analyze_knowledge_graph_connectivity(st.session_state.entities)
+                    connectivity_analysis = analyze_knowledge_graph_connectivity(entities)
                     missing_nodes = connectivity_analysis.get("missing_nodes", [])
                     
                     if missing_nodes:
                         for missing_node in missing_nodes:
-                            st.session_state.entities.append(dict(
+                            entities.append(dict(
                                 uuid=str(uuid.uuid4()),
                                 fill0=True,  # Virtual node
                                 feature_label=missing_node.lower(),
@@ -165,17 +210,16 @@ def build_app():
                 if st.button("🔗 Add All Entities", use_container_width=True):
                     # Get currently selected entity types
                     selected_types = set()
-                    for ent in st.session_state.entities:
+                    for ent in entities:
                         if ent.get("entity_type", "").strip():
                             selected_types.add(ent.get("entity_type"))
                     
                     # Add all missing entity types as virtual nodes
-                    all_entity_types = [et for et in ENTITY_TYPES if et.strip()]  # Remove empty string
-                    missing_entity_types = [et for et in all_entity_types if et not in selected_types]
+                    missing_entity_types = [et for et in NONEMPTY_ENTITY_TYPES if et not in selected_types]
                     
                     if missing_entity_types:
                         for entity_type in missing_entity_types:
-                            st.session_state.entities.append(dict(
+                            entities.append(dict(
                                 uuid=str(uuid.uuid4()),
                                 fill0=True,  # Virtual node
                                 feature_label=entity_type.lower(),
@@ -201,13 +245,10 @@ def build_app():
                 label_visibility="collapsed"
             )
 
-            saved_label_path = job_manager.handle_label_file_change(
-                lup,
-                previous_file_key="_had_label_file",
-                previous_filename_key="_label_filename"
-            )
+            saved_label_path = job_manager.handle_label_file_change(lup, state_key="_label")
 
-            st.session_state.label_path = saved_label_path
+            if ss.label_path != saved_label_path:
+                ss.label_path = saved_label_path
 
 
             # Next button
@@ -216,12 +257,19 @@ def build_app():
                 st.empty()
             with btn_r:
                 if st.button("Next ➡", key="step1_next", use_container_width=True):
+                    # Nothing changed since the last click that passed validation
+                    validation_sig = _validation_signature(entities, ss.label_path)
+                    if ss.get("_last_validated_sig") == validation_sig:
+                        set_entity_order(_build_file_order(entities))
+                        ss.step1_open, ss.step2_open = False, True
+                        st.rerun()
+
                     # Validate entities
-                    entity_validation = validate_entities(st.session_state.entities)
-                    label_validation = check_label_file(st.session_state.label_path)
+                    entity_validation = validate_entities(entities)
+                    label_validation = check_label_file(ss.label_path)
                     
                     # check connectivity of the knowledge graph
-                    connectivity_analysis = analyze_knowledge_graph_connectivity(st.session_state.entities)
+                    connectivity_analysis = analyze_knowledge_graph_connectivity(entities)
                     
                     # gather all errors
                     all_errors = []
@@ -244,174 +292,168 @@ def build_app():
                     # if entity_validation["valid"] and label_validation["valid"]:
                     if entity_validation["valid"] and label_validation["valid"] and connectivity_analysis["connected"]:
                         # Generate file order (edge types are generated dynamically in Step 2)
-                        st.session_state.file_order = _build_file_order(st.session_state.entities)
-                        st.session_state.step1_open, st.session_state.step2_open = False, True
+                        set_entity_order(_build_file_order(entities))
+                        ss.step1_open, ss.step2_open = False, True
+                        ss["_last_validated_sig"] = validation_sig
                         # log_to_console("✅ Validation passed. Proceeding to Step 2.")
                         st.rerun()
 
         # -------- Step 2 --------
-        with st.expander("Step 2 – Finalise & Run", expanded=st.session_state.step2_open):
-            l, r = st.columns(2)
-            with l:
-                st.markdown("#### Entity Order")
+        with st.expander("Step 2 – Finalise & Run", expanded=ss.step2_open):
+            if not ss.step2_open:
+                # Collapsed: skip building the ordering/edge-type widgets on Step 1 reruns
+                st.caption("Complete Step 1 and click **Next ➡** to configure entity order and edge types.")
+            else:
+                l, r = st.columns(2)
+                with l:
+                    st.markdown("#### Entity Order")
                 
-                # Render entity order
-                latest_order = render_entity_order(st.session_state.entities)
-
-                # Z-score normalization checkbox
-                st.checkbox("Apply Z-score", key="zscore_check")
-                z_before = st.session_state.get("_last_zscore_val", None)
-                z_now = st.session_state["zscore_check"]
-                if z_before is not None and z_before != z_now:
-                    status = "enabled" if z_now else "disabled"
-                    # log_to_console(f"⚙️ Z-score normalization {status}.")
-                st.session_state["_last_zscore_val"] = z_now
-                st.session_state.apply_zscore = z_now  # store in session state
-
-            with r:
-                st.markdown("#### Edge Types")
+                    # Render entity order
+                    latest_order = render_entity_order(entities)
+
+                    # Z-score normalization checkbox
+                    st.checkbox("Apply Z-score", value=ss.apply_zscore, key="zscore_check")
+                    z_before = ss.get("_last_zscore_val", None)
+                    z_now = ss["zscore_check"]
+                    if z_before is not None and z_before != z_now:
+                        status = "enabled" if z_now else "disabled"
+                        # log_to_console(f"⚙️ Z-score normalization {status}.")
+                    ss["_last_zscore_val"] = z_now
+                    ss.apply_zscore = z_now  # store in session state
+
+                with r:
+                    st.markdown("#### Edge Types")
                 
-                # Generate edge types dynamically based on current entities
-                current_edge_types = generate_edge_types_from_entities(st.session_state.entities)
+                    # Generate edge types dynamically based on current entities
+                    current_edge_types = generate_edge_types_from_entities(entities)
+                    current_edge_type_set = set(current_edge_types)
+
+                    # Read Step 2 state once; written back only when it changes
+                    edge_types = ss.get("edge_types", [])
+                    selected_edge_types = ss.get("selected_edge_types", [])
                 
-                # Update session state if edge types have changed
-                if current_edge_types != st.session_state.get("edge_types", []):
-                    st.session_state.edge_types = current_edge_types
-                    # Update selected edge types to include new ones by default
-                    current_selected = st.session_state.get("selected_edge_types", [])
-                    # Keep existing selections that are still valid, add new ones
-                    updated_selected = [et for et in current_selected if et in current_edge_types]
-                    new_edge_types = [et for et in current_edge_types if et not in updated_selected]
-                    updated_selected.extend(new_edge_types)
-                    st.session_state.selected_edge_types = updated_selected
+                    # Update session state if edge types have changed
+                    if current_edge_types != edge_types:
+                        ss.edge_types = current_edge_types
+                        # Update selected edge types to include new ones by default
+                        # Keep existing selections that are still valid, add new ones
+                        updated_selected = [et for et in selected_edge_types if et in current_edge_type_set]
+                        kept = set(updated_selected)
+                        new_edge_types = [et for et in current_edge_types if et not in kept]
+                        updated_selected.extend(new_edge_types)
+                        selected_edge_types = updated_selected
+                        ss.selected_edge_types = updated_selected
                     
-                    # Get current entity types for logging
-                    current_entities = [ent.get("entity_type", "") for ent in st.session_state.entities if ent.get("entity_type", "").strip()]
-                    # log_to_console(f" Edge types updated based on entities {current_entities}: {', '.join(current_edge_types)}")
+                        # Get current entity types for logging
+                        current_entities = [ent.get("entity_type", "") for ent in entities if ent.get("entity_type", "").strip()]
+                        # log_to_console(f" Edge types updated based on entities {current_entities}: {', '.join(current_edge_types)}")
                 
-                available_edge_types = current_edge_types
+                    available_edge_types = current_edge_types
                 
-                if available_edge_types:
-                    # Get current selection from session state
-                    current_selection = st.session_state.get("selected_edge_types", available_edge_types)
-                    
-                    # Ensure current_selection only contains valid options
-                    valid_selection = [et for et in current_selection if et in available_edge_types]
+                    if available_edge_types:
+                        # Ensure current selection only contains valid options
+                        valid_selection = [et for et in selected_edge_types if et in current_edge_type_set]
                     
-                    # Create a dynamic key for multiselect to force refresh when options change
-                    edge_types_hash = hash(tuple(sorted(available_edge_types)))
-                    multiselect_key = f"edge_multiselect_{edge_types_hash}"
+                        # Create a dynamic key for multiselect to force refresh when options change
+                        # (available_edge_types is already sorted); remember every key handed out
+                        multiselect_key = f"edge_multiselect_{hash(tuple(available_edge_types))}"
+                        ss.setdefault("_edge_multiselect_keys", set()).add(multiselect_key)
                     
-                    # Multiselect for edge types
-                    selected_edges = st.multiselect(
-                        label="Choose edge types:",
-                        options=available_edge_types,
-                        default=valid_selection,
-                        key=multiselect_key
-                    )
-
-                    # Select All / Select None buttons
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        if st.button("Select All", key="select_all_edges", use_container_width=True):
-                            st.session_state.selected_edge_types = available_edge_types.copy()
-                            # Remove multiselect's session state to force reload
-                            for key in list(st.session_state.keys()):
-                                if key.startswith("edge_multiselect_"):
-                                    del st.session_state[key]
-                            st.rerun()
-                    with col2:
-                        if st.button("Select None", key="select_none_edges", use_container_width=True):
-                            st.session_state.selected_edge_types = []
-                            # Remove multiselect's session state to force reload
-                            for key in list(st.session_state.keys()):
-                                if key.startswith("edge_multiselect_"):
-                                    del st.session_state[key]
-                            st.rerun()
+                        # Multiselect for edge types
+                        selected_edges = st.multiselect(
+                            label="Choose edge types:",
+                            options=available_edge_types,
+                            default=valid_selection,
+                            key=multiselect_key
+                        )
+
+                        # Select All / Select None buttons
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            if st.button("Select All", key="select_all_edges", use_container_width=True):
+                                ss.selected_edge_types = available_edge_types.copy()
+                                # Remove multiselect's session state to force reload
+                                _reset_edge_multiselects(ss)
+                                st.rerun()
+                        with col2:
+                            if st.button("Select None", key="select_none_edges", use_container_width=True):
+                                ss.selected_edge_types = []
+                                # Remove multiselect's session state to force reload
+                                _reset_edge_multiselects(ss)
+                                st.rerun()
                     
-                    # Update session state
-                    st.session_state.selected_edge_types = selected_edges
-                else:
-                    st.info("Edge types will be generated automatically based on your selected entities.")
-
-            # ---------- Run Controls ----------
-            btn_l, btn_r = st.columns([1, 1])
-            with btn_l:
-                if st.button("⬅ Back", key="step2_back", use_container_width=True):
-                    st.session_state.step1_open, st.session_state.step2_open = True, False
-                    st.rerun()
+                        # Update session state
+                        ss.selected_edge_types = selected_edges
+                    else:
+                        st.info("Edge types will be generated automatically based on your selected entities.")
 
-            with btn_r:
-                run_button_clicked = st.button("▶️ Submit Processing Job", key="step2_run", use_container_width=True)
-
-            if run_button_clicked:
-
-                entity_cfgs = []
-                for e in st.session_state.entities:
-                    if e["feature_label"].strip():
-                        id_info = get_id_info_from_display(e["entity_type"], e["id_type"])
-                        entity_cfgs.append(dict(
-                            feature_label=e["feature_label"],
-                            entity_type=e["entity_type"].lower(),
-                            id_type=id_info["actual_id"],
-                            match_mode=id_info["match_mode"],
-                            file_path=e["file_path"],
-                            fill0=e["fill0"]
-                        ))
-
-                label_cfg = None
-                if st.session_state.label_path:
-                    label_cfg = dict(
-                        feature_label="label",
-                        entity_type="label",
-                        id_type="",
-                        file_path=st.session_state.label_path,
-                        fill0=False
-                    )
+                # ---------- Run Controls ----------
+                btn_l, btn_r = st.columns([1, 1])
+                with btn_l:
+                    if st.button("⬅ Back", key="step2_back", use_container_width=True):
+                        ss.step1_open, ss.step2_open = True, False
+                        st.rerun()
 
-                final_payload = dict(
-                    job_id=job_id,
-                    entities_cfgs=[
-                        {
-                            **cfg,
-                            "file_path": os.path.abspath(cfg["file_path"]) if cfg["file_path"] else ""
-                        }
-                        for cfg in entity_cfgs
-                    ],
-                    label_cfg={
-                        **label_cfg,
-                        "file_path": os.path.abspath(label_cfg["file_path"]) if label_cfg and label_cfg.get("file_path") else ""
-                    } if label_cfg else None,
-                    output_dir=job_data_output_dir,
-                    finalize=dict(
-                        file_order=st.session_state.file_order,
-                        apply_zscore=st.session_state.apply_zscore,
-                        edge_types=st.session_state.selected_edge_types,
+                with btn_r:
+                    run_button_clicked = st.button("▶️ Submit Processing Job", key="step2_run", use_container_width=True)
+
+                if run_button_clicked:
+
+                    entity_cfgs = list(filter(None, map(_entity_to_cfg, entities)))
+
+                    label_cfg = None
+                    if ss.label_path:
+                        label_cfg = dict(
+                            feature_label="label",
+                            entity_type="label",
+                            id_type="",
+                            file_path=ss.label_path,
+                            fill0=False
+                        )
+
+                    final_payload = dict(
+                        job_id=job_id,
+                        entities_cfgs=entity_cfgs,
+                        label_cfg={
+                            **label_cfg,
+                            "file_path": os.path.abspath(label_cfg["file_path"]) if label_cfg and label_cfg.get("file_path") else ""
+                        } if label_cfg else None,
+                        output_dir=job_data_output_dir,
+                        finalize=dict(
+                            file_order=ss.file_order,
+                            apply_zscore=ss.apply_zscore,
+                            edge_types=ss.selected_edge_types,
+                        )
                     )
-                )
 
-                # # Debug config payload
-                # st.code(json.dumps(final_payload, indent=2), language="json")
+                    # # Debug config payload
+                    # st.json(final_payload, expanded=False)
 
-                # Submit to backend (FastAPI + Celery) with error recovery
-                with st.spinner("🚀 Submitting job to backend..."):
-                    try:
-                        task_id = safe_api_call(submit_async_processing_task, final_payload)
-                        st.session_state["submitted_task_id"] = task_id
-                        st.success(f"✅ Job submitted successfully! Task ID: `{task_id}`")
-                    except Exception as e:
-                        st.error(f"❌ Failed to submit job: {e}")
-                        st.info("💡 Please check your backend service and try again.")
+                    # Nothing changed since the last submitted (and still tracked) job: reuse it
+                    payload_sig = _payload_signature(final_payload)
+                    if "submitted_task_id" in ss and ss.get("_last_submit_sig") == payload_sig:
+                        st.info(f"ℹ️ Configuration unchanged — tracking existing task `{ss.submitted_task_id}`.")
+                    else:
+                        # Submit to backend (FastAPI + Celery) with error recovery
+                        with st.spinner("🚀 Submitting job to backend..."):
+                            try:
+                                task_id = safe_api_call(submit_async_processing_task, final_payload)
+                                ss["submitted_task_id"] = task_id
+                                ss["_last_submit_sig"] = payload_sig
+                                st.success(f"✅ Job submitted successfully! Task ID: `{task_id}`")
+                            except Exception as e:
+                                st.error(f"❌ Failed to submit job: {e}")
+                                st.info("💡 Please check your backend service and try again.")
 
             # ---------- Async Task Status ----------
-            if "submitted_task_id" in st.session_state:
+            if "submitted_task_id" in ss:
                 with st.expander("📊 Processing Status", expanded=True):
 
                     # Auto-refresh every 10 seconds for non-terminal states
-                    task_id = st.session_state.submitted_task_id
+                    task_id = ss.submitted_task_id
                     
                     try:
-                        status = safe_api_call(check_task_status, task_id)
+                        status = safe_api_call(check_task_status, task_id, retriable=True)
                     except Exception as e:
                         st.error(f"❌ Failed to check task status: {e}")
                         status = {"status": "unknown"}
@@ -442,6 +484,8 @@ def build_app():
                             st.warning("⚠️ No mapping candidates available.")
 
                     elif status.get("status") == "SUCCESS":
+                        # Finished: an explicit re-Run with the same configuration submits a new job
+                        ss.pop("_last_submit_sig", None)
                         st.success("🎉 Processing completed!")
                         
                         # Create download URL
@@ -482,10 +526,10 @@ def build_app():
 
                     elif status.get("status") == "FAILURE":
                         st.error("❌ Task failed. Please check logs or retry.")
-                        del st.session_state.submitted_task_id
+                        del ss.submitted_task_id
+                        ss.pop("_last_submit_sig", None)
 
                     else:
-                        import time
                         st.info("⏳ Still processing. Please wait.")
                         # st.spinner("⏳ Still processing. Please wait...")
                         with st.spinner("Checking status..."):
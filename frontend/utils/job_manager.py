@@ -30,10 +30,12 @@ class JobManager:
         return job_dir
 
     def get_job_info(self) -> Dict[str, Any]:
-        job_dir = self.get_job_dir()
+        job_id = self.get_job_id()
+        job_dir = self.temp_root / job_id
+        job_dir.mkdir(parents=True, exist_ok=True)
         created_at = st.session_state.get("job_created_at", time.time())
         return {
-            "job_id": self.get_job_id(),
+            "job_id": job_id,
             "job_dir": str(job_dir),
             "created_at": datetime.fromtimestamp(created_at).strftime("%Y-%m-%d %H:%M:%S"),
             "age_minutes": (time.time() - created_at) / 60,
@@ -109,31 +111,28 @@ class JobManager:
                 print(f"Error deleting label file {filename}: {e}")
         return False
 
-    def handle_label_file_change(self, uploaded_file, previous_file_key: str, previous_filename_key: str) -> str:
-
-        last_run_key = f"{previous_file_key}_last_run"
+    def handle_label_file_change(self, uploaded_file, state_key: str = "_label") -> str:
+        # All label upload bookkeeping lives in one session_state dict, mutated in place
+        label_state = st.session_state.get(state_key)
+        if label_state is None:
+            label_state = st.session_state[state_key] = {"had_file": False, "filename": "", "size": None, "path": ""}
 
         # New upload
         if uploaded_file is not None:
+            # Same file already saved on an earlier rerun
+            if (label_state["path"] and label_state["filename"] == uploaded_file.name
+                    and label_state["size"] == uploaded_file.size):
+                return label_state["path"]
             saved_path = self.save_uploaded_label_file(uploaded_file)
-            st.session_state[previous_file_key] = True
-            st.session_state[previous_filename_key] = uploaded_file.name
-            st.session_state[last_run_key] = True
-            st.session_state["_label_file_path"] = saved_path
+            label_state.update(had_file=True, filename=uploaded_file.name, size=uploaded_file.size, path=saved_path)
             return saved_path
 
         # No file previously
-        st.session_state[previous_file_key] = False
-        st.session_state[previous_filename_key] = ""
-        st.session_state[last_run_key] = False
-        st.session_state["_label_file_path"] = ""
+        if label_state["had_file"]:
+            label_state.update(had_file=False, filename="", size=None, path="")
         return ""
 
-# global singleton
-_job_manager = None
-
+# Process-wide singleton shared by all sessions (job state itself lives in session_state)
+@st.cache_resource
 def get_job_manager() -> JobManager:
-    global _job_manager
-    if _job_manager is None:
-        _job_manager = JobManager()
-    return _job_manager
\ No newline at end of file
+    return JobManager()
\ No newline at end of file
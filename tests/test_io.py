@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.service.hard_match import _read_mapped_features
+from backend.utils import io
+from backend.utils.io import read_feature_columns, read_sample_ids_for_entity, write_csv
+
+
+def test_nullable_numeric_ids_match_between_readers(tmp_path):
+    path = tmp_path / "expr.csv"
+    path.write_text("Sample,G1,G2\n101,1.5,2.0\n,3.0,4.0\n7,5.0,6.0\n0042,7.0,8.0\n")
+
+    sample_ids = read_sample_ids_for_entity(str(path))
+    assert sample_ids == ["101", "7", "0042"]
+
+    header = read_feature_columns(str(path))
+    df = _read_mapped_features(str(path), header, {"G1", "G2"})
+    assert df["Sample_ID"].dropna().tolist() == sample_ids
+    assert df["Sample_ID"].isna().sum() == 1
+
+    coded = _read_mapped_features(str(path), header, {"G1"}, sample_ids=sample_ids)
+    assert coded["Sample_ID"].tolist()[::2] == ["101", "7"]
+    assert pd.isna(coded["Sample_ID"].iloc[1])
+
+
+@pytest.mark.parametrize("df", [
+    pd.DataFrame({"Index": [0, 1, 2], "ID": ["a", "", None], "Score": [1.0, np.nan, 1e-05], "Flag": [True, False, True]}),
+    pd.DataFrame({"Score": np.array([0.1, 1e16, np.nan], dtype="float32"), "Count": pd.array([1, None, 3], dtype="Int64")}),
+    pd.DataFrame({"Flag": pd.array([True, None, False], dtype="boolean"), "ID": ["x", "y", "z"]}),
+    pd.DataFrame({"ID": ["x", "", None]}),
+    pd.DataFrame({"Name": ["TP53", 'a "quoted", name'], "Desc": ["line\nbreak", "plain"]}),
+])
+def test_write_csv_matches_to_csv(tmp_path, df):
+    path = tmp_path / "out.csv"
+    write_csv(df, str(path))
+    assert path.read_text() == df.to_csv(index=False)
+
+
+def test_redis_cache_is_bounded_and_expires(monkeypatch):
+    monkeypatch.setattr(io, "_redis_cache", {})
+    now = [1000.0]
+    monkeypatch.setattr(io.time, "monotonic", lambda: now[0])
+
+    for i in range(io._REDIS_CACHE_MAXSIZE + 10):
+        io._cache_set(f"common_ids:job_{i}", [i])
+    assert len(io._redis_cache) == io._REDIS_CACHE_MAXSIZE
+    assert io._cache_get("common_ids:job_0") is None
+    assert io._cache_get(f"common_ids:job_{io._REDIS_CACHE_MAXSIZE + 9}") == [io._REDIS_CACHE_MAXSIZE + 9]
+
+    # Expired entries are dropped by the next insert, even if never read again
+    now[0] += io._REDIS_CACHE_TTL + 1
+    io._cache_set("mappings:job_new", {})
+    assert list(io._redis_cache) == ["mappings:job_new"]
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, ex=None):
+        self.store[key] = value
+
+
+def test_write_csv_if_changed(tmp_path, monkeypatch):
+    fake = _FakeRedis()
+    monkeypatch.setattr(io, "r", fake)
+    path = tmp_path / "gene_id_map.csv"
+    df = pd.DataFrame({"BioMedGraphica_Conn_ID": ["G1", "G2"], "Original_ID": ["TP53", "EGFR"]})
+
+    assert io.write_csv_if_changed(df, str(path)) is True
+    mtime_ns = path.stat().st_mtime_ns
+    # Same table: skipped, file untouched, and no sidecar written into the output dir
+    assert io.write_csv_if_changed(df, str(path)) is False
+    assert path.stat().st_mtime_ns == mtime_ns
+    assert [p.name for p in tmp_path.iterdir()] == ["gene_id_map.csv"]
+
+    changed = df.assign(Original_ID=["TP53", "ERBB1"])
+    assert io.write_csv_if_changed(changed, str(path)) is True
+    assert path.read_text() == changed.to_csv(index=False)
+
+    # File edited since the digest was recorded: rewritten
+    path.write_text("stale\n")
+    assert io.write_csv_if_changed(changed, str(path)) is True
+    assert path.read_text() == changed.to_csv(index=False)
+
+    # Digest record missing, or the file deleted: rewritten
+    fake.store.clear()
+    assert io.write_csv_if_changed(changed, str(path)) is True
+    path.unlink()
+    assert io.write_csv_if_changed(changed, str(path)) is True
+    assert path.read_text() == changed.to_csv(index=False)